@@ -0,0 +1,67 @@
+"""circuit breaker for an endpoint of the game. While the game isn't running or a replay is still loading, every
+request is another connection attempt that fails, so after a few failures in a row the breaker opens and nothing
+goes out until a probe gets an answer again. Probes back off exponentially, a link that was forgotten while the
+game is closed only knocks every half minute. The probing itself is up to
+whoever uses the breaker"""
+import Metrics
+
+# requests go out
+UP = "up"
+# nothing goes out until the next probe is due
+DOWN = "down"
+# a probe is on its way, nothing else goes out until it's back
+PROBING = "probing"
+
+
+class CircuitBreaker(object):
+    """threshold is how many failed requests in a row open the breaker, a failed probe opens it right away. The first
+    retry comes after delay seconds, every failed probe doubles that up to max_delay"""
+    def __init__(self, threshold=3, delay=0.5, max_delay=30.0):
+        self.threshold = threshold
+        self.min_delay = delay
+        self.max_delay = max_delay
+        self.delay = delay
+        self.failures = 0
+        # when the next probe is due while the breaker is open
+        self.retry_at = None
+        # nothing is known about the game yet, the first probe decides
+        self.state = PROBING
+
+    @property
+    def allowed(self):
+        return self.state == UP
+
+    def success(self):
+        # returns True if this closed the breaker
+        changed = self.state != UP
+        self.state = UP
+        self.failures = 0
+        self.delay = self.min_delay
+        self.retry_at = None
+        return changed
+
+    def failure(self):
+        # returns True if this opened the breaker
+        self.failures += 1
+        # requests that were already on their way when it opened don't push the next probe back
+        if self.state == DOWN or (self.state == UP and self.failures < self.threshold):
+            return False
+        return self.trip()
+
+    def trip(self):
+        # opens the breaker no matter how many failures there were, returns True if it wasn't open already
+        changed = self.state != DOWN
+        self.state = DOWN
+        self.retry_at = Metrics.clock() + self.delay
+        self.delay = min(self.delay * 2, self.max_delay)
+        return changed
+
+    def probe(self):
+        # an open breaker goes half open while the probe is out, one that is up keeps letting requests through
+        if self.state == DOWN:
+            self.state = PROBING
+
+    def retry_in(self):
+        if self.retry_at is None:
+            return 0.0
+        return max(self.retry_at - Metrics.clock(), 0.0)
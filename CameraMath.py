@@ -0,0 +1,220 @@
+"""conversion between maya cameras and the league replay camera. Nothing in here imports maya or qt, so it can be
+used from the live link, the bake and import, worker processes and plain python alike.
+
+every conversion comes in two flavours: a scalar one for a single frame that only needs the math module, and a
+batched one that works on numpy arrays with one row per frame. The live link only ever uses the scalar ones, so the
+batched ones import numpy themselves"""
+import math
+
+# rotation orders in the same order as maya's rotateOrder enum and MEulerRotation
+ROTATE_ORDERS = ("xyz", "yzx", "zxy", "xzy", "yxz", "zyx")
+# league wants its rotations in zxy
+LEAGUE_ORDER = 2
+
+# columns of a render payload array, the same keys the /replay/render endpoint uses
+RENDER_COLUMNS = ("cameraPosition.x", "cameraPosition.y", "cameraPosition.z",
+                  "cameraRotation.x", "cameraRotation.y", "cameraRotation.z",
+                  "depthOfFieldNear", "depthOfFieldMid", "depthOfFieldFar", "fieldOfView")
+
+# league uses different units for the dof
+DOF_SCALE = 10
+
+
+def _parity(order):
+    # even permutations of xyz flip the sign of a couple of terms when decomposing a matrix
+    return 1 if ROTATE_ORDERS[order] in ("xyz", "yzx", "zxy") else -1
+
+
+def _axes(order):
+    return ["xyz".index(axis) for axis in ROTATE_ORDERS[order]]
+
+
+def _multiply(a, b):
+    return [[sum(a[r][n] * b[n][c] for n in range(3)) for c in range(3)] for r in range(3)]
+
+
+def _axis_matrix(axis, angle):
+    c = math.cos(angle)
+    s = math.sin(angle)
+    # y is the odd one out in a right handed system, its sine terms are flipped
+    s *= -1 if axis == 1 else 1
+    m = [[0.0] * 3 for _ in range(3)]
+    a, b = [j for j in range(3) if j != axis]
+    m[axis][axis] = 1.0
+    m[a][a] = c
+    m[b][b] = c
+    m[a][b] = -s
+    m[b][a] = s
+    return m
+
+
+def rotation_matrix(angles, order=0):
+    """(column vector) rotation matrix of angles (radians) in the given maya rotate order. Maya applies the first
+    axis of the order first, so the matrices get multiplied in reverse"""
+    i, j, k = _axes(order)
+    return _multiply(_axis_matrix(k, angles[k]), _multiply(_axis_matrix(j, angles[j]), _axis_matrix(i, angles[i])))
+
+
+def reorder_euler(angles, source=0, target=LEAGUE_ORDER):
+    # the same thing as MEulerRotation.reorder for a single (x, y, z) rotation in radians
+    if source == target:
+        return tuple(angles)
+    m = rotation_matrix(angles, source)
+    i, j, k = _axes(target)
+    parity = _parity(target)
+    result = [0.0] * 3
+    result[j] = math.asin(max(-1.0, min(1.0, -parity * m[k][i])))
+    if abs(math.cos(result[j])) < 1e-9:
+        # gimbal lock, the first and last axis rotate around the same axis so put everything into the first one
+        result[i] = math.atan2(-parity * m[j][k], m[j][j])
+    else:
+        result[i] = math.atan2(parity * m[k][j], m[k][k])
+        result[k] = math.atan2(parity * m[j][i], m[i][i])
+    return tuple(result)
+
+
+def camera_to_league(transform, order=0):
+    """convert translate and rotate (radians) values of a maya camera into a league camera position and rotation,
+    returns a tuple of (position, rotation) where rotation is in degrees"""
+    # x has to be flipped because the in-game map is flipped along the y axis
+    position = (transform[0] * -1, transform[1], transform[2])
+
+    angles = [math.degrees(angle) for angle in reorder_euler(transform[3:6], order, LEAGUE_ORDER)]
+    # camera in league is flipped, therefore we need to apply x to y as well as multiplying them by -1 and
+    # adding 180 to X
+    rotation = ((angles[1] + 180) * -1, angles[0] * -1, angles[2])
+    return position, rotation
+
+
+def league_to_camera(position, rotation, order=0):
+    # inverse of camera_to_league, returns translate and rotate (radians) values for a camera in the given order
+    angles = [math.radians(angle) for angle in (rotation[1] * -1, rotation[0] * -1 - 180, rotation[2])]
+    angles = reorder_euler(angles, LEAGUE_ORDER, order)
+    return (position[0] * -1, position[1], position[2]) + tuple(angles)
+
+
+def dof_range(fp, width, near_offset=0.0, far_offset=0.0):
+    # near and far of the dof, the same thing the leagueDoF node in the createCamera plug-in computes
+    return max(fp - width + near_offset, 0.0), max(fp + width + far_offset, 0.0)
+
+
+def dof_to_league(near, mid, far):
+    return near * DOF_SCALE, mid * DOF_SCALE, far * DOF_SCALE
+
+
+def render_frame(transform, dof=(0.0, 0.0, 0.0, 0.0), order=0):
+    """one full render payload row in RENDER_COLUMNS order from the camera's translate and rotate values and its
+    (near, mid, far, fov) values"""
+    position, rotation = camera_to_league(transform, order)
+    return position + rotation + dof_to_league(*dof[:3]) + (dof[3],)
+
+
+def rotation_matrices(angles, order=0):
+    # batched version of rotation_matrix, one matrix per row of angles
+    import numpy as np
+    angles = np.asarray(angles, dtype=np.float64)
+    count = len(angles)
+    matrices = []
+    for axis in range(3):
+        c = np.cos(angles[:, axis])
+        s = np.sin(angles[:, axis]) * (-1 if axis == 1 else 1)
+        m = np.zeros((count, 3, 3))
+        a, b = [j for j in range(3) if j != axis]
+        m[:, axis, axis] = 1
+        m[:, a, a] = c
+        m[:, b, b] = c
+        m[:, a, b] = -s
+        m[:, b, a] = s
+        matrices.append(m)
+    i, j, k = _axes(order)
+    return np.matmul(matrices[k], np.matmul(matrices[j], matrices[i]))
+
+
+def reorder(angles, source=0, target=LEAGUE_ORDER):
+    # batched version of reorder_euler, converts (N, 3) angles (radians) from one rotate order to another
+    import numpy as np
+    angles = np.asarray(angles, dtype=np.float64)
+    if source == target:
+        return angles
+    m = rotation_matrices(angles, source)
+    i, j, k = _axes(target)
+    parity = _parity(target)
+    result = np.empty((len(m), 3))
+    result[:, j] = np.arcsin(np.clip(-parity * m[:, k, i], -1, 1))
+    result[:, i] = np.arctan2(parity * m[:, k, j], m[:, k, k])
+    result[:, k] = np.arctan2(parity * m[:, j, i], m[:, i, i])
+    locked = np.abs(np.cos(result[:, j])) < 1e-9
+    result[locked, i] = np.arctan2(-parity * m[locked, j, k], m[locked, j, j])
+    result[locked, k] = 0
+    return result
+
+
+def to_league(transforms, order=0):
+    """batched version of camera_to_league, converts an (N, 6) array of translate and rotate values into (N, 3)
+    league positions and (N, 3) rotations"""
+    import numpy as np
+    transforms = np.asarray(transforms, dtype=np.float64)
+    position = transforms[:, :3].copy()
+    position[:, 0] *= -1
+
+    angles = np.degrees(reorder(transforms[:, 3:6], order, LEAGUE_ORDER))
+    rotation = np.empty_like(angles)
+    rotation[:, 0] = (angles[:, 1] + 180) * -1
+    rotation[:, 1] = angles[:, 0] * -1
+    rotation[:, 2] = angles[:, 2]
+    return position, rotation
+
+
+def from_league(position, rotation, order=0):
+    """batched version of league_to_camera. Position and rotation tracks don't have to share their key times, so
+    either of them can be empty, the matching columns of the (N, 6) result are left untouched then"""
+    import numpy as np
+    position = np.asarray(position, dtype=np.float64).reshape(-1, 3)
+    rotation = np.asarray(rotation, dtype=np.float64).reshape(-1, 3)
+    transforms = np.zeros((max(len(position), len(rotation)), 6))
+    transforms[:len(position), :3] = position
+    transforms[:len(position), 0] *= -1
+
+    angles = np.empty((len(rotation), 3))
+    angles[:, 0] = rotation[:, 1] * -1
+    angles[:, 1] = rotation[:, 0] * -1 - 180
+    angles[:, 2] = rotation[:, 2]
+    transforms[:len(rotation), 3:] = reorder(np.radians(angles), LEAGUE_ORDER, order)
+    return transforms
+
+
+def unwrap(angles, starts=()):
+    """batched, (N, 3) angles in degrees with the full turns between consecutive rows taken out. Reordering picks
+    every row's angles on its own, so a pan across 180 degrees would otherwise jump by almost a full turn from one
+    frame to the next and the game would spin the camera around in between. starts are rows that begin a new run,
+    e.g. a cut to another camera, every run gets unwrapped on its own"""
+    import numpy as np
+    angles = np.array(angles, dtype=np.float64)
+    bounds = [0] + sorted(int(start) for start in starts if 0 < start < len(angles)) + [len(angles)]
+    for first, last in zip(bounds[:-1], bounds[1:]):
+        if last - first > 1:
+            angles[first:last] = np.degrees(np.unwrap(np.radians(angles[first:last]), axis=0))
+    return angles
+
+
+def dof_inputs(near, mid, far):
+    """batched inverse of dof_range, returns (focal point, width, offset) arrays that reproduce the given near, mid
+    and far values when the same offset is used for both near and far"""
+    import numpy as np
+    near = np.asarray(near, dtype=np.float64)
+    far = np.asarray(far, dtype=np.float64)
+    return np.asarray(mid, dtype=np.float64), (far - near) / 2, (far + near) / 2 - mid
+
+
+def render_batch(transforms, dof=None, order=0):
+    """batched version of render_frame, takes an (N, 6) transform array and an optional (N, 4) array of
+    (near, mid, far, fov) values and returns an (N, 10) array of render payloads in RENDER_COLUMNS order"""
+    import numpy as np
+    transforms = np.asarray(transforms, dtype=np.float64)
+    result = np.zeros((len(transforms), len(RENDER_COLUMNS)))
+    result[:, :3], result[:, 3:6] = to_league(transforms, order)
+    if dof is not None:
+        dof = np.asarray(dof, dtype=np.float64)
+        result[:, 6:9] = dof[:, :3] * DOF_SCALE
+        result[:, 9] = dof[:, 3]
+    return result
@@ -0,0 +1,76 @@
+"""cut list of an edit, which camera is active for which frames. Cuts are kept sorted by their start frame, so the
+camera of any frame is a binary search away no matter how many cuts there are. Resolving the cameras is up to whoever
+uses the list"""
+import bisect
+
+
+class CutList(object):
+    """ranges are half open, a cut from 10 to 20 covers everything from frame 10 up to but not including frame 20, so
+    subframes between two cuts always belong to exactly one of them. Cuts never overlap, adding a cut trims or
+    removes whatever it covers"""
+    def __init__(self, cuts=()):
+        self.starts = []
+        self.ends = []
+        self.cameras = []
+        for cut in cuts:
+            self.add(*cut)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        return iter(zip(self.starts, self.ends, self.cameras))
+
+    def add(self, start, end, camera):
+        if end <= start:
+            raise ValueError("Cut has to end after it starts")
+        cuts = []
+        for cut_start, cut_end, cut_camera in self:
+            # keep whatever sticks out on either side of the new cut
+            if cut_start < start:
+                cuts.append((cut_start, min(cut_end, start), cut_camera))
+            if cut_end > end:
+                cuts.append((max(cut_start, end), cut_end, cut_camera))
+        cuts.append((start, end, camera))
+        cuts.sort()
+        self.starts = [cut[0] for cut in cuts]
+        self.ends = [cut[1] for cut in cuts]
+        self.cameras = [cut[2] for cut in cuts]
+
+    def clear(self):
+        self.starts = []
+        self.ends = []
+        self.cameras = []
+
+    def index(self, frame):
+        # index of the cut that contains frame, None if it falls between cuts
+        i = bisect.bisect_right(self.starts, frame) - 1
+        if i >= 0 and frame < self.ends[i]:
+            return i
+        return None
+
+    def camera(self, frame):
+        i = self.index(frame)
+        return None if i is None else self.cameras[i]
+
+    def segments(self, start, end):
+        """split start to end (exclusive) into consecutive (start, end, index) segments, index is the cut that is
+        active during the segment or None for the gaps between cuts"""
+        i = max(bisect.bisect_right(self.starts, start) - 1, 0)
+        while start < end:
+            # skip the cuts that are already over
+            while i < len(self) and self.ends[i] <= start:
+                i += 1
+            if i < len(self) and self.starts[i] <= start:
+                segment_end = min(self.ends[i], end)
+                yield start, segment_end, i
+            else:
+                # a gap, which lasts until the next cut starts
+                segment_end = min(self.starts[i], end) if i < len(self) else end
+                yield start, segment_end, None
+            start = segment_end
+
+    def unique_cameras(self):
+        # every camera once, in the order they first appear in the edit
+        seen = set()
+        return [camera for camera in self.cameras if not (camera in seen or seen.add(camera))]
@@ -0,0 +1,56 @@
+"""turns render and playback frames into request bodies without going through json.dumps. Every payload shape has a
+precompiled byte template with fixed precision float fields, so encoding a frame is a single format operation with
+no intermediate dictionaries or strings. Json has no nan or infinity, so frames holding them get rejected instead of
+sent as a body the game would refuse."""
+
+TRUE = b"true"
+FALSE = b"false"
+# what %f turns nan and infinities into, none of the field names contains them
+NOT_FINITE = (b"nan", b"inf")
+
+
+class FrameEncoder(object):
+    # body of every payload shape without the surrounding braces, %f gets replaced with the configured precision
+    fields = {
+        "camera": b'"cameraPosition":{"x":%f,"y":%f,"z":%f},"cameraRotation":{"x":%f,"y":%f,"z":%f}',
+        "dof": b'"depthOfFieldNear":%f,"depthOfFieldMid":%f,"depthOfFieldFar":%f',
+        "fov": b'"fieldOfView":%f',
+        "playback": b'"paused":%s,"speed":%f,"time":%f'
+    }
+    # number of values each shape takes
+    sizes = {
+        "camera": 6,
+        "dof": 3,
+        "fov": 1,
+        "playback": 3
+    }
+
+    def __init__(self, precision=4):
+        self.precision = precision
+        self.float_format = "%.{}f".format(precision).encode("ascii")
+        # payloads made of several shapes get their template built once and cached
+        self.templates = {}
+        for shape in self.fields:
+            self.template((shape,))
+
+    def template(self, shapes):
+        try:
+            return self.templates[shapes]
+        except KeyError:
+            body = b",".join(self.fields[shape] for shape in shapes)
+            template = b"{" + body.replace(b"%f", self.float_format) + b"}"
+            self.templates[shapes] = template
+            return template
+
+    def encode(self, shapes, values):
+        """shapes is a tuple of shape names and values a flat tuple with the values of all of them in the same order,
+        booleans have to be passed as TRUE or FALSE. Raises ValueError if any of the values is nan or infinite"""
+        body = self.template(shapes) % values
+        # searching the body is a lot cheaper than checking every value before formatting it
+        if NOT_FINITE[0] in body or NOT_FINITE[1] in body:
+            raise ValueError("Frame has nan or infinite values")
+        return body
+
+    @staticmethod
+    def boolean(value):
+        return TRUE if value else FALSE
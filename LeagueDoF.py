@@ -0,0 +1,69 @@
+"""lookups on the leagueDoF node of the createCamera plug-in. Only needs the maya api, so the live link can find a
+camera's dof without importing the bake code and numpy along with it"""
+from maya.api import OpenMaya
+from maya import cmds
+from UndoStack import UndoStack
+
+# cameras made by leagueCam before it had the leagueDoF node kept this attribute, the current ones don't have it
+LEGACY_ATTR = "oldMid"
+
+
+def find_dof(obj):
+    # the leagueDoF node that is connected to the camera, raises a RuntimeError if there is none
+    try:
+        plug = OpenMaya.MFnDependencyNode(obj).findPlug("focalPoint", False)
+    except RuntimeError:
+        raise RuntimeError("Camera has no DoF attributes")
+    for destination in plug.destinations():
+        node = destination.node()
+        if OpenMaya.MFnDependencyNode(node).typeName == "leagueDoF":
+            return node
+    raise RuntimeError("No leagueDoF node connected to the camera")
+
+
+def upgrade(camera):
+    """give a camera made by the leagueCam from before the leagueDoF node a node of its own, so its dof and fov get
+    linked like any other camera's. near and far keep their values: what focal point and width don't cover goes into
+    the offsets, keyed wherever near and far were keyed. Returns the name of the new node, None if the camera didn't
+    need one"""
+    sel_list = OpenMaya.MSelectionList()
+    sel_list.add(camera)
+    obj = sel_list.getDependNode(0)
+    if not OpenMaya.MFnDependencyNode(obj).hasAttribute(LEGACY_ATTR):
+        return None
+    try:
+        find_dof(obj)
+    except RuntimeError:
+        pass
+    else:
+        return None
+    cmds.loadPlugin("createCamera", quiet=True)
+
+    def value(attr, frame=None):
+        if frame is None:
+            return cmds.getAttr("{}.{}".format(camera, attr))
+        return cmds.getAttr("{}.{}".format(camera, attr), time=frame)
+
+    with UndoStack("Upgrade leagueCam"):
+        for attr, short_name, side, sign in (("nearOffset", "no", "near", -1), ("farOffset", "fo", "far", 1)):
+            if not cmds.attributeQuery(attr, node=camera, exists=True):
+                cmds.addAttr(camera, longName=attr, shortName=short_name, attributeType="float", defaultValue=0,
+                             minValue=-1000, keyable=True)
+            # near = focal point - width + near offset, far = focal point + width + far offset
+            frames = cmds.keyframe("{}.{}".format(camera, side), query=True, timeChange=True) or []
+            for frame in frames:
+                offset = value(side, frame) - value("focalPoint", frame) - sign * value("width", frame)
+                cmds.setKeyframe(camera, attribute=attr, time=frame, value=offset)
+            if frames:
+                cmds.cutKey(camera, attribute=side, clear=True)
+            else:
+                cmds.setAttr("{}.{}".format(camera, attr), value(side) - value("focalPoint") - sign * value("width"))
+
+        node = cmds.createNode("leagueDoF", name="{}DoF".format(camera.rpartition("|")[2].rpartition(":")[2]))
+        for attr in ("focalPoint", "width", "nearOffset", "farOffset", "fov"):
+            cmds.connectAttr("{}.{}".format(camera, attr), "{}.{}".format(node, attr))
+        # near and far only show the node's result from now on
+        for output, attr in (("dofNear", "near"), ("dofFar", "far")):
+            cmds.connectAttr("{}.{}".format(node, output), "{}.{}".format(camera, attr), force=True)
+            cmds.setAttr("{}.{}".format(camera, attr), keyable=False, channelBox=True)
+    return node
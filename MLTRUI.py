@@ -4,10 +4,13 @@ from maya.app.general import mayaMixin
 from PySide2 import QtWidgets, QtGui, QtCore
 from shiboken2 import wrapInstance
 from functools import partial
-import pymel.core as pm
+from maya import cmds, mel
 import os
+import Cuts
+import LeagueDoF
+import Metrics
 import MTLR
-reload(MTLR)
+import ReplayApiData
 
 maya_useNewAPI = True
 
@@ -23,15 +26,26 @@ class UI(mayaMixin.MayaQWidgetDockableMixin, QtWidgets.QDialog):
         # set the object name to ensure safe deletion
         self.setObjectName("MLTRUI")
         MTLR.TimeSliderCallback.ui = self
-        self.callback = None
+        self.sequence = None
+        self.stepper = None
+        self.capture = None
         self.mode = None
+        self.cuts = Cuts.CutList()
         self.commands = MTLR.MayaToLeagueReplay()
+        self.commands.on_renamed = self.camera_renamed
+        self.commands.on_lost = self.camera_lost
+        # scrubbing, reading the replay's time and the clock sync's seeks all go through the same seek manager
+        self.seeks = MTLR.SeekManager()
+        self.clock_sync = MTLR.ClockSync(self.seeks)
         MTLR.TimeSliderCallback.ui = self
         # get path of the Icon folder by grabbing the current file location
         self.icons = os.path.join(os.path.dirname(__file__), "assets/icons")
         self.fonts = os.path.join(os.path.dirname(__file__), "assets/fonts")
         self.main_layout = QtWidgets.QVBoxLayout(self)
         self.buildui()
+        # the live link's timer callback, adapts the tick rate to how fast the game answers
+        self.scheduler = MTLR.TickScheduler(self.commands.sender, partial(self.commands.set_pos, self.camera_name),
+                                            self.tick_rate.value(), self.min_rate.value(), self.adaptive.isChecked())
 
         self.main_layout.addItem(QtWidgets.QSpacerItem(0, 0, QtWidgets.QSizePolicy.Fixed,
                                                        QtWidgets.QSizePolicy.Expanding))
@@ -42,7 +56,7 @@ class UI(mayaMixin.MayaQWidgetDockableMixin, QtWidgets.QDialog):
         """skipping time in the replay is not instant, so we should limit the rate a bit. We do this by only updating
         when finishing scrubbing on the timeline. However, maya doesn't have a callback for when you finish scrubbing
         so we implement it by adding an event to the time slider"""
-        slider = pm.mel.eval('$tmpVar=$gPlayBackSlider')
+        slider = mel.eval('$tmpVar=$gPlayBackSlider')
         ptr = O_OMUI.MQtUtil.findControl(slider)
         self.widget = wrapInstance(long(ptr), QtWidgets.QWidget)
         # then we simply instantiate the event filter we created in MLTR and install it
@@ -52,6 +66,11 @@ class UI(mayaMixin.MayaQWidgetDockableMixin, QtWidgets.QDialog):
         # then we need to connect maya's playback to leagues with a callback
         self.playing_callback = OpenMaya.MConditionMessage.addConditionCallback("playingBack", self.update_playing)
 
+        self.stats_timer = QtCore.QTimer(self)
+        self.stats_timer.timeout.connect(self.update_stats)
+        self.stats_timer.start(500)
+        self.update_stats()
+
     # I use a separate method to add elements to the QDialog; can be put into the __init__ as well
     def buildui(self):
         fixed = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed)
@@ -79,6 +98,7 @@ class UI(mayaMixin.MayaQWidgetDockableMixin, QtWidgets.QDialog):
 
         self.time_link = QtWidgets.QCheckBox("Time Link")
         self.time_link.setSizePolicy(fixed)
+        self.time_link.toggled.connect(self.toggle_time_link)
         link_layout.addWidget(self.time_link, 0, 4)
 
         self.tick_rate = QtWidgets.QSpinBox()
@@ -86,13 +106,41 @@ class UI(mayaMixin.MayaQWidgetDockableMixin, QtWidgets.QDialog):
         self.tick_rate.setMaximum(200)
         self.tick_rate.setValue(60)
         self.tick_rate.setSizePolicy(fixed)
+        self.tick_rate.setToolTip("Maximum tick rate")
+        self.tick_rate.valueChanged.connect(self.update_rate)
         link_layout.addWidget(self.tick_rate, 1, 0)
 
+        self.min_rate = QtWidgets.QSpinBox()
+        self.min_rate.setMinimum(1)
+        self.min_rate.setMaximum(200)
+        self.min_rate.setValue(10)
+        self.min_rate.setSizePolicy(fixed)
+        self.min_rate.setToolTip("Minimum tick rate when adapting")
+        self.min_rate.valueChanged.connect(self.update_rate)
+        link_layout.addWidget(self.min_rate, 1, 1)
+
+        self.adaptive = QtWidgets.QCheckBox("Adaptive")
+        self.adaptive.setChecked(True)
+        self.adaptive.setSizePolicy(fixed)
+        self.adaptive.toggled.connect(self.update_rate)
+        link_layout.addWidget(self.adaptive, 1, 2)
+
         self.start_btn = QtWidgets.QPushButton("Start")
         icon = QtGui.QIcon("{}/play.png".format(self.icons))
         self.start_btn.setIcon(icon)
         self.start_btn.clicked.connect(self.register_callback)
-        link_layout.addWidget(self.start_btn, 1, 1, 1, 4)
+        link_layout.addWidget(self.start_btn, 1, 3, 1, 2)
+
+        # every replay client the link sends to, the first one is the one that gets read from
+        self.clients = QtWidgets.QLineEdit(ReplayApiData.format_clients(ReplayApiData.clients))
+        self.clients.setToolTip("Replay clients as host:port, separated by commas. host:port/3 lets a client have 3 "
+                                "requests per endpoint on their way at once")
+        self.clients.editingFinished.connect(self.apply_clients)
+        link_layout.addWidget(self.clients, 2, 0, 1, 5)
+
+        # queue depth and drop counts of the sender thread
+        self.link_stats = QtWidgets.QLabel()
+        link_layout.addWidget(self.link_stats, 3, 0, 1, 5)
 
         json_group = GroupBox("League Director Integration")
         json_layout = QtWidgets.QHBoxLayout(json_group)
@@ -102,20 +150,123 @@ class UI(mayaMixin.MayaQWidgetDockableMixin, QtWidgets.QDialog):
         json_layout.addWidget(time_btn)
 
         import_btn = QtWidgets.QPushButton("Import Keyframes")
+        import_btn.clicked.connect(self.import_keys)
         json_layout.addWidget(import_btn)
 
         export_btn = QtWidgets.QPushButton("Export Keyframes")
+        export_btn.clicked.connect(self.export_keys)
         json_layout.addWidget(export_btn)
 
+        # how far reduced tracks may stray from the bake, in each track's own units
+        self.tolerance = QtWidgets.QDoubleSpinBox()
+        self.tolerance.setDecimals(3)
+        self.tolerance.setRange(0, 100)
+        self.tolerance.setSingleStep(0.01)
+        self.tolerance.setValue(0.01)
+        self.tolerance.setToolTip("Keyframe reduction tolerance for exported and pushed sequences")
+        json_layout.addWidget(self.tolerance)
+
+        self.push_btn = QtWidgets.QPushButton("Push Sequence")
+        self.push_btn.setCheckable(True)
+        self.push_btn.toggled.connect(self.push_sequence)
+        json_layout.addWidget(self.push_btn)
+
+        # steps the replay through the playback range frame by frame for final output
+        self.step_btn = QtWidgets.QPushButton("Step Render")
+        self.step_btn.setCheckable(True)
+        self.step_btn.toggled.connect(self.step_render)
+        json_layout.addWidget(self.step_btn)
+
+        # records the replay's camera, e.g. moved with the free camera, and keys it on the linked camera
+        self.capture_rate = QtWidgets.QSpinBox()
+        self.capture_rate.setRange(1, 240)
+        self.capture_rate.setValue(60)
+        self.capture_rate.setToolTip("Capture samples per second")
+        json_layout.addWidget(self.capture_rate)
+
+        self.capture_btn = QtWidgets.QPushButton("Capture")
+        self.capture_btn.setCheckable(True)
+        self.capture_btn.toggled.connect(self.capture_camera)
+        json_layout.addWidget(self.capture_btn)
+
+        # cut list, which camera the link and the bake follow for which frames
+        cut_group = GroupBox("Cuts")
+        cut_layout = QtWidgets.QGridLayout(cut_group)
+        self.cut_info = QtWidgets.QLabel("No cuts")
+        cut_layout.addWidget(self.cut_info, 0, 0, 1, 3)
+
+        add_cut_btn = QtWidgets.QPushButton("Add Cut")
+        add_cut_btn.setToolTip("Cut to the selected camera for the playback range")
+        add_cut_btn.clicked.connect(self.add_cut)
+        cut_layout.addWidget(add_cut_btn, 1, 0)
+
+        shots_btn = QtWidgets.QPushButton("From Shots")
+        shots_btn.setToolTip("Replace the cuts with the shots of the camera sequencer")
+        shots_btn.clicked.connect(self.load_shots)
+        cut_layout.addWidget(shots_btn, 1, 1)
+
+        clear_cuts_btn = QtWidgets.QPushButton("Clear")
+        clear_cuts_btn.clicked.connect(self.clear_cuts)
+        cut_layout.addWidget(clear_cuts_btn, 1, 2)
+
+        # per stage timings of the link, tells whether maya, the sender or the game holds things up
+        health = GroupBox("Link Health")
+        health_layout = QtWidgets.QGridLayout(health)
+        for column, name in enumerate(("Stage", "p50 ms", "p99 ms", "max ms")):
+            header = QtWidgets.QLabel(name)
+            header.setStyleSheet("QLabel{font-weight: bold}")
+            health_layout.addWidget(header, 0, column)
+        self.stage_labels = {}
+        for row, stage in enumerate(Metrics.STAGES, 1):
+            health_layout.addWidget(QtWidgets.QLabel(stage.capitalize()), row, 0)
+            self.stage_labels[stage] = [QtWidgets.QLabel() for _ in range(3)]
+            for column, label in enumerate(self.stage_labels[stage], 1):
+                health_layout.addWidget(label, row, column)
+        self.counter_labels = QtWidgets.QLabel()
+        self.counter_labels.setWordWrap(True)
+        health_layout.addWidget(self.counter_labels, len(Metrics.STAGES) + 1, 0, 1, 4)
+        # one line per replay client, shows which one falls behind
+        self.client_labels = QtWidgets.QLabel()
+        health_layout.addWidget(self.client_labels, len(Metrics.STAGES) + 2, 0, 1, 4)
+
+        reset_btn = QtWidgets.QPushButton("Reset")
+        reset_btn.clicked.connect(self.reset_metrics)
+        health_layout.addWidget(reset_btn, len(Metrics.STAGES) + 3, 0)
+
+        dump_btn = QtWidgets.QPushButton("Dump Trace")
+        dump_btn.clicked.connect(self.dump_trace)
+        health_layout.addWidget(dump_btn, len(Metrics.STAGES) + 3, 1)
+
+        # records every request of the session so ReplayPlayer can reproduce it without maya
+        self.record_btn = QtWidgets.QPushButton("Record Session")
+        self.record_btn.setCheckable(True)
+        self.record_btn.toggled.connect(self.record_session)
+        health_layout.addWidget(self.record_btn, len(Metrics.STAGES) + 3, 2, 1, 2)
+
         self.main_layout.addWidget(live_link)
+        self.main_layout.addWidget(cut_group)
         self.main_layout.addWidget(json_group)
+        self.main_layout.addWidget(health)
 
     # method that gets triggered whenever the gui closes, used for cleanup
     def dockCloseEventTriggered(self):
         self.remove_callback()
+        self.clock_sync.stop()
+        self.seeks.stop()
+        self.commands.cleanup()
         OpenMaya.MMessage.removeCallback(self.playing_callback)
         self.widget.removeEventFilter(self.filter)
         self.dof_cleanup()
+        self.push_btn.setChecked(False)
+        self.record_btn.setChecked(False)
+        # closing throws the take away, only stopping the capture writes it
+        if self.capture is not None:
+            self.capture.stop()
+            self.capture = None
+        self.step_btn.setChecked(False)
+        self.stats_timer.stop()
+        # stop the sender thread, the next ui gets a fresh one
+        MTLR.Sender.shutdown()
 
     def dof_cleanup(self):
         try:
@@ -130,17 +281,19 @@ class UI(mayaMixin.MayaQWidgetDockableMixin, QtWidgets.QDialog):
     @staticmethod
     def create_cam():
         try:
-            pm.leagueCam()
+            cmds.leagueCam()
         except AttributeError:
             try:
-                pm.loadPlugin("createCamera")
+                cmds.loadPlugin("createCamera")
             except RuntimeError:
                 OpenMaya.MGlobal.displayError("Plugin not found, did you install it correctly?")
                 return
-            pm.leagueCam()
+            cmds.leagueCam()
 
     def update_playing(self, *args, **kwargs):
         if not self.time_link.isChecked():
+            # a time link that got switched off during playback must not keep correcting the replay
+            self.clock_sync.stop()
             return
         # define quick dictionary so we don't update any other values
         playback = {
@@ -148,12 +301,237 @@ class UI(mayaMixin.MayaQWidgetDockableMixin, QtWidgets.QDialog):
         }
         # do the post request
         self.commands.post("playback", playback)
+        # keep both clocks together for as long as maya plays
+        if OpenMayaAnim.MAnimControl.isPlaying():
+            self.clock_sync.start()
+        else:
+            self.clock_sync.stop()
+
+    def toggle_time_link(self, checked):
+        # switching the time link off during playback stops the clock sync right away
+        if not checked:
+            self.clock_sync.stop()
 
     def update_time(self):
-        # grab the current time in league
-        reply = self.commands.get("playback")
-        # once finished, update maya's values
-        reply.finished.connect(partial(self.commands.update_maya, reply))
+        # grab the current time in league, once it's there update maya's values
+        self.seeks.read()
+
+    def import_keys(self):
+        if not self.camera_name.text():
+            self.show_status("Error: No camera selected")
+            return
+        path = QtWidgets.QFileDialog.getOpenFileName(self, "Import Keyframes", "",
+                                                     "League Director Sequence (*.json)")[0]
+        if not path:
+            return
+        # Sequence brings numpy with it, so it only gets imported once it's needed
+        import Sequence
+        keys, rate = Sequence.import_keys(path, self.camera_name.text())
+        self.show_status("Imported {} keys ({:.0f} keys/s)".format(keys, rate))
+
+    def export_keys(self):
+        if not self.camera_name.text():
+            self.show_status("Error: No camera selected")
+            return
+        path = QtWidgets.QFileDialog.getSaveFileName(self, "Export Keyframes", "",
+                                                     "League Director Sequence (*.json)")[0]
+        if not path:
+            return
+        import Sequence
+        try:
+            frames, duration, ratio = Sequence.export(path, self.camera_name.text(), cuts=self.cuts,
+                                                      tolerance=self.tolerance.value())
+        except RuntimeError:
+            self.camera_lost(self.camera_name.text())
+            return
+        self.show_status("Exported {} frames in {:.2f}s, {:.1f}x fewer keys".format(frames, duration, ratio))
+
+    def push_sequence(self, checked):
+        if not checked:
+            if self.sequence is not None:
+                self.sequence.cleanup()
+                self.sequence = None
+                self.show_status("Sequence removed")
+            return
+        if not self.camera_name.text():
+            self.show_status("Error: No camera selected")
+            self.push_btn.setChecked(False)
+            return
+        # the game plays the sequence by itself, streaming frames on top of it would only fight over the camera
+        self.remove_callback()
+        self.step_btn.setChecked(False)
+        self.capture_btn.setChecked(False)
+        try:
+            self.sequence = MTLR.SequencePush(self.camera_name.text(), self.cuts, self.tolerance.value())
+        except RuntimeError:
+            # the camera got deleted since it was linked
+            self.camera_lost(self.camera_name.text())
+            self.push_btn.setChecked(False)
+            return
+        frames = self.sequence.push()
+        self.show_status("Pushed {} frames, {:.1f}x fewer keys".format(frames, self.sequence.ratio))
+
+    def step_render(self, checked):
+        if not checked:
+            if self.stepper is not None:
+                self.stepper.stop()
+            return
+        if not self.camera_name.text():
+            self.show_status("Error: No camera selected")
+            self.step_btn.setChecked(False)
+            return
+        # nothing else may move the camera or the clock while stepping
+        self.remove_callback()
+        self.clock_sync.stop()
+        self.seeks.stop()
+        self.push_btn.setChecked(False)
+        self.capture_btn.setChecked(False)
+        try:
+            self.stepper = MTLR.FrameStepper(self.camera_name.text(), self.cuts)
+        except RuntimeError:
+            self.camera_lost(self.camera_name.text())
+            self.step_btn.setChecked(False)
+            return
+        self.stepper.on_progress = self.step_progress
+        self.stepper.on_finished = self.step_finished
+        self.stepper.start()
+
+    def capture_camera(self, checked):
+        if not checked:
+            if self.capture is None:
+                return
+            capture, self.capture = self.capture, None
+            samples, keys, rate = capture.finish()
+            self.show_status("Captured {} samples, wrote {} keys ({:.0f} keys/s)".format(samples, keys, rate), 10000)
+            return
+        if not self.camera_name.text():
+            self.show_status("Error: No camera selected")
+            self.capture_btn.setChecked(False)
+            return
+        # the camera gets keyed from the game, so maya may not move the game's camera at the same time
+        self.remove_callback()
+        self.clock_sync.stop()
+        self.push_btn.setChecked(False)
+        self.step_btn.setChecked(False)
+        self.capture = MTLR.Capture(self.camera_name.text(), self.capture_rate.value())
+        self.capture.start()
+
+    def step_progress(self, done, count, fps):
+        self.show_status("Frame {}/{} ({:.1f} fps)".format(done, count, fps))
+
+    def step_finished(self, result):
+        self.stepper = None
+        self.step_btn.blockSignals(True)
+        self.step_btn.setChecked(False)
+        self.step_btn.blockSignals(False)
+        if result["error"] is not None:
+            self.show_status("Error: {}".format(result["error"]), 10000)
+        else:
+            self.show_status("Stepped {frames}/{count} frames ({fps:.1f} fps)".format(**result), 10000)
+
+    def add_cut(self):
+        try:
+            selection = OpenMaya.MGlobal.getActiveSelectionList().getDagPath(0)
+        except (IndexError, TypeError):
+            self.show_status("Error: No camera selected")
+            return
+        start = OpenMayaAnim.MAnimControl.minTime().value
+        end = OpenMayaAnim.MAnimControl.maxTime().value
+        # the playback range includes its last frame
+        self.cuts.add(start, end + 1, selection.partialPathName())
+        self.apply_cuts()
+
+    def load_shots(self):
+        import Sequence
+        self.cuts = Sequence.shot_cuts()
+        self.apply_cuts()
+
+    def clear_cuts(self):
+        self.cuts.clear()
+        self.apply_cuts()
+
+    def apply_cuts(self):
+        # resolves every camera of the cut list right away, so the link never has to look one up while it runs
+        self.upgrade_cameras(self.cuts.unique_cameras())
+        try:
+            self.commands.set_cuts(self.cuts)
+        except RuntimeError:
+            self.show_status("Error: Camera of a cut doesn't exist")
+            self.cuts.clear()
+            self.commands.set_cuts(self.cuts)
+        if self.cuts:
+            self.cut_info.setText("{} cuts, {} cameras, frames {:g} to {:g}".format(
+                len(self.cuts), len(self.cuts.unique_cameras()), self.cuts.starts[0], self.cuts.ends[-1] - 1))
+        else:
+            self.cut_info.setText("No cuts")
+        self.link_dof()
+
+    def update_stats(self):
+        if self.capture is not None:
+            self.show_status("Capturing: {} samples".format(len(self.capture.take)), 1000)
+        stats = self.commands.sender.stats()
+        self.link_stats.setText("Link: {link}  Queue: {queue}  Sent: {sent}  Dropped: {dropped}  Rate: {rate}".format(
+            rate=self.scheduler.rate if self.scheduler.running else "-", **stats))
+
+        metrics = self.commands.sender.metrics
+        for stage, labels in self.stage_labels.items():
+            summary = metrics.stages[stage].summary()
+            for label, key in zip(labels, ("p50", "p99", "max")):
+                label.setText("-" if not summary["count"] else "{:.2f}".format(summary[key] * 1000))
+        counters = metrics.counters
+        self.counter_labels.setText(
+            "Skipped: {}  Suspended: {}  Probes: {}  Seeks: {} ({} superseded)  HTTP errors: {}  TLS errors: {}  "
+            "Invalid: {}  Bottleneck: {}".format(counters["skipped"], counters["suspended"], counters["probes"],
+                                                 counters["seeks"], counters["superseded"], counters["http_errors"],
+                                                 counters["tls_errors"], counters["invalid"],
+                                                 metrics.bottleneck() or "-"))
+        self.client_labels.setText("\n".join(
+            "{name}: {state}  Sent: {sent}  Merged: {merged}  Latency: {ms}".format(
+                ms="-" if client["latency"] is None else "{:.2f} ms".format(client["latency"] * 1000), **client)
+            for client in self.commands.sender.client_stats()))
+
+    def apply_clients(self):
+        try:
+            hosts = ReplayApiData.parse_clients(self.clients.text())
+        except ValueError as e:
+            self.show_status(str(e))
+            self.clients.setText(ReplayApiData.format_clients(ReplayApiData.clients))
+            return
+        if hosts == ReplayApiData.clients:
+            return
+        self.commands.sender.set_clients(hosts)
+        self.clients.setText(ReplayApiData.format_clients(hosts))
+        self.show_status("Sending to {} replay client{}".format(len(hosts), "s" if len(hosts) > 1 else ""))
+
+    def reset_metrics(self):
+        self.commands.sender.metrics.reset()
+        self.update_stats()
+
+    def record_session(self, checked):
+        if not checked:
+            records = self.commands.sender.stop_recording()
+            if records is not None:
+                self.show_status("Recorded {} requests".format(records))
+            return
+        path = QtWidgets.QFileDialog.getSaveFileName(self, "Record Session", "", "Session Log (*.mtlr)")[0]
+        if not path:
+            self.record_btn.setChecked(False)
+            return
+        self.commands.sender.record(path)
+        self.show_status("Recording to {}".format(path))
+
+    def dump_trace(self):
+        path = QtWidgets.QFileDialog.getSaveFileName(self, "Dump Trace", "", "JSON (*.json);;CSV (*.csv)")[0]
+        if not path:
+            return
+        events = self.commands.sender.metrics.dump(path)
+        self.show_status("Wrote {} events to {}".format(events, path))
+
+    def update_rate(self, *args):
+        # the rate can be changed while the link is running, the scheduler just swaps its timer callback
+        self.min_rate.setMaximum(self.tick_rate.value())
+        self.scheduler.set_bounds(self.min_rate.value(), self.tick_rate.value())
+        self.scheduler.set_adaptive(self.adaptive.isChecked())
 
     def show_status(self, message, time=5000):
         # quick method for showing status bar messages
@@ -165,55 +543,78 @@ class UI(mayaMixin.MayaQWidgetDockableMixin, QtWidgets.QDialog):
         except IndexError:
             self.show_status("Error: Nothing selected")
             return
-        name = OpenMaya.MFnDependencyNode(selection).absoluteName()
-        # if possible, do some cleanup so the ui looks a bit better
-        if name.startswith(":"):
-            name = name.replace(":", "", 1)
+        # a fresh grab gets another go at a camera that went missing
+        self.commands.cleanup()
+        self.camera_name.setText(MTLR.node_name(selection))
+        self.link_dof()
+
+    def camera_renamed(self, name):
+        # keep the field in step with the node, the link itself keeps following the same camera
         self.camera_name.setText(name)
 
+    def camera_lost(self, name):
+        self.show_status("Error: Camera {} not found, grab a camera to link it again".format(name), 10000)
+
+    def upgrade_cameras(self, names):
+        # cameras from before the leagueDoF node get one, without it their dof and fov wouldn't reach the game
+        upgraded = []
+        for name in names:
+            try:
+                if LeagueDoF.upgrade(name) is not None:
+                    upgraded.append(name)
+            except RuntimeError as error:
+                self.show_status("Error: Couldn't add a leagueDoF node to {}: {}".format(name, error), 10000)
+        if upgraded:
+            self.show_status("Added a leagueDoF node to {}".format(", ".join(upgraded)), 10000)
+
+    def link_dof(self):
         self.dof_cleanup()
+        # with a cut list the link reads the dof of whichever camera is active by itself
+        if self.cuts or not self.camera_name.text():
+            return
+        self.upgrade_cameras([self.camera_name.text()])
+        sel_list = OpenMaya.MSelectionList()
         try:
-            dag = OpenMaya.MFnDagNode(selection)
-            dag.findPlug("dofSep", False)
-        except:
+            sel_list.add(self.camera_name.text())
+            self.DoF = MTLR.DoF(sel_list.getDependNode(0))
+        except RuntimeError:
             self.show_status("No suitable camera for DoF found")
-        else:
-            self.DoF = MTLR.DoF(selection)
 
     def register_callback(self):
         if not self.camera_name.text():
             self.show_status("Error: No camera selected")
             return
-        if self.callback is not None:
+        if self.scheduler.running:
             self.remove_callback()
         else:
-            self.callback = OpenMaya.MTimerMessage.addTimerCallback(1.0 / self.tick_rate.value(),
-                                                                    self.commands.set_pos,
-                                                                    self.camera_name)
+            self.push_btn.setChecked(False)
+            self.step_btn.setChecked(False)
+            self.capture_btn.setChecked(False)
+            # make sure the first tick always gets sent, even if the camera didn't move since the last run
+            self.commands.last = None
+            self.commands.frame.last_dof = None
+            # every tick sends one merged render frame from now on
+            self.commands.frame.follow_ticks(True)
+            self.scheduler.start()
             # when adding the callback also set the button icon and text
             icon = QtGui.QIcon("{}/stop.png".format(self.icons))
             self.start_btn.setIcon(icon)
             self.start_btn.setText("Stop")
-            self.tick_rate.setEnabled(False)
             # quick debug message
             OpenMaya.MGlobal.displayWarning("Successfully added callback")
 
     def remove_callback(self):
-        # just attempt to remove the callback, if it doesn't work ignore it
-        try:
-            OpenMaya.MMessage.removeCallback(self.callback)
-        except (TypeError, RuntimeError):
-            pass
-        else:
-            # reset self.callback to None so the check in register_callback() works as intended
-            self.callback = None
-            # once again change the button's icon and text
-            icon = QtGui.QIcon("{}/play.png".format(self.icons))
-            self.start_btn.setText("Start")
-            self.start_btn.setIcon(icon)
-            self.tick_rate.setEnabled(True)
-            # quick debug message
-            OpenMaya.MGlobal.displayWarning("Successfully removed callback")
+        # nothing to do if the link isn't running
+        if not self.scheduler.running:
+            return
+        self.scheduler.stop()
+        self.commands.frame.follow_ticks(False)
+        # once again change the button's icon and text
+        icon = QtGui.QIcon("{}/play.png".format(self.icons))
+        self.start_btn.setText("Start")
+        self.start_btn.setIcon(icon)
+        # quick debug message
+        OpenMaya.MGlobal.displayWarning("Successfully removed callback")
 
 
 class GroupBox(QtWidgets.QGroupBox):
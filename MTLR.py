@@ -1,9 +1,19 @@
 from maya.api import OpenMaya, OpenMayaAnim
+import maya.utils
 from PySide2 import QtCore, QtNetwork
+from functools import partial
+import collections
 import json
 import math
+import threading
 import time
 import ReplayApiData
+import Breaker
+import CameraMath
+import FrameEncoder
+import LeagueDoF
+import Metrics
+import SessionLog
 
 # necessary variable to tell maya to use OpenMaya Api 2.0
 maya_useNewAPI = True
@@ -21,22 +31,762 @@ class TimeSliderCallback(QtCore.QObject):
         if self.ui.time_link.isChecked():
             # check if left mouse button was released
             if event.type() == QtCore.QEvent.MouseButtonRelease and event.button() == QtCore.Qt.LeftButton:
-                # get time in seconds
+                # get time in seconds, releasing again before the last seek went out only moves that seek
                 current_time = OpenMayaAnim.MAnimControl.currentTime().asUnits(3)
                 self.ui.commands.playback["time"] = current_time
-                self.ui.commands.post("playback")
+                self.ui.seeks.seek(current_time, self.ui.commands.playback)
         # return False so whatever eventFilter was already installed by maya can still handle the same event
         return False
 
 
+def camera_fields(values):
+    # (translate, rotate, rotate order) of the camera, x gets flipped and the rotation reordered to zxy for league
+    position, rotation = CameraMath.camera_to_league(values[:6], int(values[6]))
+    return [("camera", position + rotation)]
+
+
+def dof_fields(values):
+    # (near, mid, far) in maya units
+    return [("dof", CameraMath.dof_to_league(*values))]
+
+
+def fov_fields(values):
+    return [("fov", values)]
+
+
+def frame_fields(frame):
+    # a whole render frame, a dictionary of whichever of the kinds below changed during the tick
+    fields = []
+    for kind, values in frame.items():
+        fields.extend(SHAPES[kind](values))
+    return fields
+
+
+def playback_fields(values):
+    # (paused, speed, time)
+    return [("playback", (FrameEncoder.FrameEncoder.boolean(values[0]), values[1], values[2]))]
+
+
+# kinds of plain float frames the maya callbacks can send, the worker turns them into FrameEncoder shapes
+SHAPES = {
+    "camera": camera_fields,
+    "dof": dof_fields,
+    "fov": fov_fields,
+    "frame": frame_fields,
+    "playback": playback_fields
+}
+
+
+class RenderFrame(object):
+    """collects every render field that changes during a tick so camera, dof and fov always reach the game together
+    in a single request that only contains what actually changed. While the live link is running its ticks flush
+    the frame, otherwise the frame flushes itself once maya is idle"""
+    def __init__(self, sender):
+        self.sender = sender
+        self.fields = {}
+        self.ticking = False
+        self.scheduled = False
+        # (near, mid, far, fov) the game got last, shared by the ticks and the DoF callbacks so neither resends what
+        # the other one already sent
+        self.last_dof = None
+
+    def set(self, kind, values):
+        self.fields[kind] = values
+        if not self.ticking and not self.scheduled:
+            self.scheduled = True
+            maya.utils.executeDeferred(self.flush)
+
+    def set_dof(self, values):
+        # only the dof and fov values that changed since the last time go into the frame
+        last = self.last_dof
+        self.last_dof = values
+        if last is None or values[:3] != last[:3]:
+            self.set("dof", tuple(values[:3]))
+        if last is None or values[3] != last[3]:
+            self.set("fov", (values[3],))
+
+    def follow_ticks(self, ticking):
+        self.ticking = ticking
+        if not ticking:
+            self.flush()
+
+    def flush(self):
+        self.scheduled = False
+        if not self.fields:
+            return
+        # hand the dictionary over to the sender thread and start a fresh one
+        fields = self.fields
+        self.fields = {}
+        self.sender.post("render", fields, "frame")
+
+
+class Payload(object):
+    """pending request body of one endpoint, shared by every replay client that is waiting for the same frames. Frames
+    stay plain tuples in the FrameEncoder's shapes until the request goes out, only the odd partial update that comes
+    in as a dictionary makes it fall back to json"""
+    def __init__(self, encoder, posted):
+        self.encoder = encoder
+        self.fields = {}
+        self.data = None
+        # the encoded body, kept until the next frame comes in so other clients can send it as well
+        self.body = None
+        # when the oldest frame in here was posted, everything until the request goes out counts as dispatch time
+        self.posted = posted
+
+    def add(self, fields, data):
+        # fields of a shaped frame, or the dictionary if it came without a shape
+        if fields is None:
+            self.add_data(data)
+        else:
+            self.add_fields(fields)
+
+    def add_fields(self, fields):
+        # latest value of every shape wins
+        for shape, values in fields:
+            self.fields[shape] = values
+        if self.data is not None:
+            self.fold()
+        self.body = None
+
+    def add_data(self, data):
+        if self.data is None:
+            self.data = {}
+        self.fold()
+        self.data.update(data)
+        self.body = None
+
+    def fold(self):
+        # move the plain fields into the dictionary so they can be merged with it
+        if self.fields:
+            try:
+                self.data.update(json.loads(self.encode()))
+            except ValueError:
+                # fields with nan or infinite values can't be sent, the dictionary still can
+                pass
+            self.fields = {}
+
+    def encode(self):
+        if self.data is not None and not self.fields:
+            return json.dumps(self.data)
+        shapes = tuple(sorted(self.fields))
+        if len(shapes) == 1:
+            return self.encoder.encode(shapes, self.fields[shapes[0]])
+        return self.encoder.encode(shapes, tuple(value for shape in shapes for value in self.fields[shape]))
+
+
+def copy_payload(data):
+    # nested dictionaries get copied as well, the caller is free to keep changing its templates
+    return dict((key, dict(value) if isinstance(value, dict) else value) for key, value in data.items())
+
+
+def unreachable(reply):
+    """whether a reply means the game isn't there to answer. Network errors are below 100, server errors from 400 on
+    are what the replay api answers while a replay is still loading. Anything else still came from a running game"""
+    error = reply.error()
+    return error != QtNetwork.QNetworkReply.NoError and (error < 100 or error >= 400)
+
+
+class ReplayClient(QtCore.QObject):
+    """one replay client the sender fans out to. Pending payloads, requests in flight, stats and the circuit breaker
+    are all kept per client, so a slow or missing client only ever merges its own frames and never holds up the
+    others. Has to be created on the sender thread"""
+    def __init__(self, worker, host, port, limit=1, probe_interval=5000, probe_timeout=2000):
+        super(ReplayClient, self).__init__()
+        self.worker = worker
+        self.metrics = worker.metrics
+        self.name = "{}:{}".format(host, port)
+        self.urls = dict((url, ReplayApiData.client_url(host, port, url)) for url in ReplayApiData.urls)
+        # requests per endpoint that may be on their way at once. With more than one a far away client can keep several
+        # frames going, but an older frame may then arrive after a newer one
+        self.limit = limit
+        self.closed = False
+
+        """anything posted while the limit is reached gets merged into the pending payload, so newer values simply
+        replace older ones and stale frames never queue up"""
+        self.pending = {}
+        self.in_flight = collections.Counter()
+        # per endpoint request, reply and merge counts plus a smoothed reply latency in seconds
+        self.sent = collections.Counter()
+        self.replies = collections.Counter()
+        self.merged = collections.Counter()
+        self.latency = {}
+        # the seek that is on its way, a newer seek aborts it
+        self.seek_reply = None
+
+        """while the breaker is open payloads keep getting merged but nothing goes out, once a probe gets through the
+        latest values of every endpoint are sent right away. An idle client gets probed every probe_interval (ms) so
+        we notice the game going away even if nothing is sent"""
+        self.breaker = Breaker.CircuitBreaker()
+        self.probe_interval = probe_interval
+        self.probe_reply = None
+        self.last_reply = Metrics.clock()
+        self.probe_timer = QtCore.QTimer(self)
+        self.probe_timer.setSingleShot(True)
+        self.probe_timer.timeout.connect(self.probe)
+        self.abort_timer = QtCore.QTimer(self)
+        self.abort_timer.setSingleShot(True)
+        self.abort_timer.setInterval(probe_timeout)
+        self.abort_timer.timeout.connect(self.abort_probe)
+
+    @property
+    def busy(self):
+        return bool(self.pending or sum(self.in_flight.values()))
+
+    def close(self):
+        # replies that are still on their way finish on their own, they just don't send anything new
+        self.closed = True
+        self.probe_timer.stop()
+        self.abort_probe()
+
+    def request(self, url):
+        return request(url, self.worker.ssl_config, self.urls[url])
+
+    def flush(self):
+        if not self.breaker.allowed:
+            return
+        for url in list(self.pending):
+            if self.in_flight[url] < self.limit:
+                self.send(url)
+
+    def send(self, url):
+        # returns the reply
+        payload = self.pending.pop(url)
+        try:
+            body = self.worker.encode(payload)
+        except ValueError:
+            # nan or infinite values, the game would refuse the whole frame
+            self.metrics.count("invalid")
+            return None
+        recorder = self.worker.recorder
+        # the session log holds what the primary client got, the others got the same frames or fewer of them
+        if recorder is not None and self is self.worker.clients[0]:
+            recorder.write(time.time(), url, body)
+        reply = self.worker.manager.post(self.request(url), body)
+        reply.ignoreSslErrors()
+        self.in_flight[url] += 1
+        self.sent[url] += 1
+        sent = Metrics.clock()
+        # from posting the oldest frame in the payload until it was handed to qt, waiting for the thread and for the
+        # previous request included
+        self.metrics.record("dispatch", sent - payload.posted)
+        self.metrics.count("sent")
+        reply.finished.connect(partial(self.finished, url, sent, reply))
+        return reply
+
+    def seek(self, payload):
+        """send a seek right away, no matter how many playback requests are on their way. Returns True if it aborted
+        the previous seek, which the game would otherwise finish before starting on this one. While the breaker is
+        open the seek waits with the other pending payloads"""
+        aborted = self.seek_reply is not None
+        if aborted:
+            self.seek_reply.abort()
+        self.pending["playback"] = payload
+        if self.breaker.allowed and not self.closed:
+            self.seek_reply = self.send("playback")
+        return aborted
+
+    def finished(self, url, sent, reply):
+        # read and free every reply, otherwise they pile up in memory for as long as the manager lives
+        self.in_flight[url] -= 1
+        if reply is self.seek_reply:
+            self.seek_reply = None
+        if reply.error() == QtNetwork.QNetworkReply.OperationCanceledError:
+            # a newer seek aborted this one, which says nothing about the game
+            reply.deleteLater()
+            return
+        self.last_reply = Metrics.clock()
+        latency = self.last_reply - sent
+        self.metrics.record("reply", latency)
+        error = reply.error()
+        if error == QtNetwork.QNetworkReply.SslHandshakeFailedError:
+            self.metrics.count("tls_errors")
+        elif error != QtNetwork.QNetworkReply.NoError:
+            self.metrics.count("http_errors")
+        if not unreachable(reply):
+            self.breaker.success()
+        elif self.breaker.failure() and not self.closed:
+            self.schedule_probe()
+        self.replies[url] += 1
+        previous = self.latency.get(url)
+        self.latency[url] = latency if previous is None else previous + 0.2 * (latency - previous)
+        if self.worker.on_reply is not None:
+            self.worker.on_reply(url, latency, reply)
+        reply.readAll()
+        reply.deleteLater()
+        # send whatever came in while we were waiting
+        if url in self.pending and self.breaker.allowed and not self.closed:
+            self.send(url)
+
+    def schedule_probe(self):
+        # an open breaker retries once its backoff ran out, a client that is up only gets checked while it's idle
+        if self.probe_reply is not None:
+            return
+        if self.breaker.allowed:
+            self.probe_timer.start(self.probe_interval)
+        else:
+            self.probe_timer.start(int(self.breaker.retry_in() * 1000))
+
+    @QtCore.Slot()
+    def probe(self):
+        if self.probe_reply is not None or self.closed:
+            return
+        # whatever got sent recently already told us the game is there
+        idle = Metrics.clock() - self.last_reply
+        if self.breaker.allowed and sum(self.in_flight.values()):
+            self.probe_timer.start(self.probe_interval)
+            return
+        if self.breaker.allowed and idle < self.probe_interval / 1000.0:
+            self.probe_timer.start(int(self.probe_interval - idle * 1000))
+            return
+        self.breaker.probe()
+        self.metrics.count("probes")
+        # reading the playback state is the cheapest thing the replay api answers
+        self.probe_reply = self.worker.manager.get(self.request("playback"))
+        self.probe_reply.ignoreSslErrors()
+        self.probe_reply.finished.connect(self.probed)
+        self.abort_timer.start()
+
+    @QtCore.Slot()
+    def abort_probe(self):
+        # a game that accepts the connection but never answers is as good as gone, aborting finishes the reply
+        if self.probe_reply is not None:
+            self.probe_reply.abort()
+
+    @QtCore.Slot()
+    def probed(self):
+        reply, self.probe_reply = self.probe_reply, None
+        self.abort_timer.stop()
+        if unreachable(reply):
+            self.breaker.trip()
+        else:
+            self.last_reply = Metrics.clock()
+            self.breaker.success()
+        reply.readAll()
+        reply.deleteLater()
+        if self.closed:
+            return
+        self.schedule_probe()
+        # everything that piled up while the game was gone goes out now, only the latest values made it this far
+        self.flush()
+
+
+class SenderWorker(QtCore.QObject):
+    """lives on the sender thread and does everything that isn't reading maya: serialization, the actual requests
+    and handling the replies. Every frame goes to every replay client, clients that keep up share their payloads so
+    each frame only gets merged and encoded once no matter how many clients there are"""
+    wake = QtCore.Signal()
+    # replaces the replay clients with a list of (host, port, limit), emitted from the main thread
+    configure = QtCore.Signal(object)
+    # endpoints that always get sent as a whole, a newer payload replaces the pending one instead of being merged
+    documents = {"sequence"}
+
+    def __init__(self, frames, metrics):
+        super(SenderWorker, self).__init__()
+        self.frames = frames
+        self.metrics = metrics
+        self.encoder = FrameEncoder.FrameEncoder()
+        self.manager = None
+        self.ssl_config = None
+        self.waking = False
+        # the first client is the primary, the TickScheduler follows its pace and the session log records it
+        self.clients = []
+        # optional function that gets called with (url, latency in seconds, reply) for every finished reply, it is
+        # called from the sender thread
+        self.on_reply = None
+        # optional SessionLog.Recorder that gets every request body that goes out
+        self.recorder = None
+        """(playback data, posted, superseded) of the latest seek, seeks don't go through the frames so they can't fall
+        out of the ring buffer. superseded counts the seeks it replaced before reaching the worker, every superseded
+        seek gets counted on this thread so the counter only has one writer. The lock covers handing it over until the
+        primary's seek is on its way, so the main thread never sees a seek as done in between"""
+        self.seek = None
+        self.seek_lock = threading.Lock()
+        self.wake.connect(self.drain)
+        self.configure.connect(self.set_clients)
+
+    @QtCore.Slot()
+    def setup(self):
+        # has to happen on the sender thread so the manager and its connections belong to it
+        self.manager = QtNetwork.QNetworkAccessManager(self)
+        self.ssl_config = ssl_config()
+        self.set_clients(ReplayApiData.clients)
+
+    @QtCore.Slot(object)
+    def set_clients(self, hosts):
+        # clients that stay keep their pending payloads, stats and breaker
+        old = dict((client.name, client) for client in self.clients)
+        clients = []
+        for host, port, limit in hosts:
+            client = old.pop("{}:{}".format(host, port), None)
+            if client is not None:
+                client.limit = limit
+            else:
+                client = ReplayClient(self, host, port, limit)
+                # the first probe also opens the connection, so the first frame doesn't have to wait for the handshake
+                client.probe()
+            clients.append(client)
+        for client in old.values():
+            client.close()
+        self.clients = clients
+
+    @QtCore.Slot()
+    def drain(self):
+        self.waking = False
+        if self.manager is None:
+            return
+        while self.frames:
+            url, shape, values, posted = self.frames.popleft()
+            fields = None if shape is None else SHAPES[shape](values)
+            # a payload shared by several clients only has to take every frame once
+            fresh = None
+            merged = set()
+            for client in self.clients:
+                payload = client.pending.get(url)
+                # latest value of every key wins, this keeps partial updates like dof and camera from overwriting
+                # each other. Frames that got replaced before they were sent count as dropped
+                if payload is not None:
+                    self.metrics.count("merged")
+                    client.merged[url] += 1
+                if payload is None or url in self.documents:
+                    if fresh is None:
+                        fresh = Payload(self.encoder, posted)
+                        fresh.add(fields, values)
+                    client.pending[url] = fresh
+                elif id(payload) not in merged:
+                    merged.add(id(payload))
+                    payload.add(fields, values)
+        with self.seek_lock:
+            seek, self.seek = self.seek, None
+            if seek is not None:
+                self.send_seek(*seek)
+        for client in self.clients:
+            client.flush()
+
+    def send_seek(self, data, posted, superseded):
+        # playback values that are still pending go along with the seek, the seek's own values win
+        payloads = {}
+        aborted = False
+        for client in self.clients:
+            pending = client.pending.pop("playback", None)
+            payload = payloads.get(id(pending))
+            if payload is None:
+                payload = pending or Payload(self.encoder, posted)
+                payload.add_data(data)
+                payloads[id(pending)] = payload
+            aborted |= client.seek(payload)
+        # a seek that got aborted on several clients was still only replaced once
+        if superseded or aborted:
+            self.metrics.count("superseded", superseded + aborted)
+
+    def encode(self, payload):
+        # shared payloads only get encoded by the first client that sends them
+        if payload.body is None:
+            start = Metrics.clock()
+            payload.body = payload.encode()
+            self.metrics.record("encode", Metrics.clock() - start)
+        return payload.body
+
+
+def ssl_config():
+    # league client is using a self-signed certificate, so don't bother verifying it
+    config = QtNetwork.QSslConfiguration.defaultConfiguration()
+    config.setPeerVerifyMode(QtNetwork.QSslSocket.VerifyNone)
+    return config
+
+
+def request(url, config, address=None):
+    # type has to be set to application/json, the address defaults to the primary client's
+    result = QtNetwork.QNetworkRequest(QtCore.QUrl(address or ReplayApiData.urls[url]))
+    result.setHeader(QtNetwork.QNetworkRequest.ContentTypeHeader, "application/json")
+    result.setSslConfiguration(config)
+    return result
+
+
+class Sender(object):
+    """every Requests instance shares one sender. Maya callbacks only put plain frames into a bounded ring buffer,
+    a dedicated thread picks them up and does the serialization and networking so none of that can stall the
+    viewport. Gets stay on the main thread since their replies have to update maya"""
+    _instance = None
+
+    def __init__(self, size=256):
+        super(Sender, self).__init__()
+        self.ssl_config = ssl_config()
+        self.manager = QtNetwork.QNetworkAccessManager()
+
+        # when the buffer is full the oldest frame falls out, which we count as dropped
+        self.frames = collections.deque(maxlen=size)
+        self.metrics = Metrics.Metrics()
+
+        self.frame = RenderFrame(self)
+
+        self.thread = QtCore.QThread()
+        self.worker = SenderWorker(self.frames, self.metrics)
+        self.worker.moveToThread(self.thread)
+        self.thread.started.connect(self.worker.setup)
+        self.thread.start()
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @classmethod
+    def shutdown(cls, timeout=2000):
+        # whatever got posted last, like resetting the speed or clearing the sequence, still reaches the game
+        if cls._instance is not None:
+            cls._instance.settle(timeout)
+            cls._instance.thread.quit()
+            cls._instance.thread.wait()
+            cls._instance.stop_recording()
+            cls._instance = None
+
+    def settle(self, timeout):
+        """wait up to timeout ms for the queued frames to go out and the replies on their way to come back. Clients
+        whose breaker is open are left out, their pending payloads would only go out once the game is back"""
+        self.frame.flush()
+        if not self.unsettled():
+            return
+        loop = QtCore.QEventLoop()
+        poll = QtCore.QTimer()
+        poll.timeout.connect(lambda: None if self.unsettled() else loop.quit())
+        poll.start(10)
+        QtCore.QTimer.singleShot(timeout, loop.quit)
+        loop.exec_()
+        poll.stop()
+
+    def unsettled(self):
+        if self.frames or self.worker.seek is not None:
+            return True
+        return any(sum(client.in_flight.values()) or (client.pending and client.breaker.allowed)
+                   for client in self.worker.clients)
+
+    def request(self, url):
+        return request(url, self.ssl_config)
+
+    def post(self, url, data, shape=None):
+        # data is either a plain tuple of floats in one of the SHAPES or a dictionary
+        if shape is None:
+            data = copy_payload(data)
+        if len(self.frames) == self.frames.maxlen:
+            self.metrics.count("overflow")
+        self.frames.append((url, shape, data, Metrics.clock()))
+        # one wake up is enough no matter how many frames come in before the worker gets to them
+        if not self.worker.waking:
+            self.worker.waking = True
+            self.worker.wake.emit()
+
+    def seek(self, data, superseded=0):
+        """seek every replay client to the playback values in data. Unlike posts, a seek doesn't wait for the playback
+        requests on their way, it aborts the previous seek of each client and goes out right away. superseded is the
+        number of seeks this one replaced before it got here, the worker counts them along with its own"""
+        with self.worker.seek_lock:
+            if self.worker.seek is not None:
+                # the worker never got to the previous one
+                superseded += self.worker.seek[2] + 1
+            self.worker.seek = (copy_payload(data), Metrics.clock(), superseded)
+        if not self.worker.waking:
+            self.worker.waking = True
+            self.worker.wake.emit()
+
+    @property
+    def seeking(self):
+        # whether a seek hasn't reached the primary client yet
+        with self.worker.seek_lock:
+            primary = self.primary
+            return self.worker.seek is not None or (primary is not None and primary.seek_reply is not None)
+
+    @property
+    def sent_count(self):
+        return self.metrics.counters["sent"]
+
+    @property
+    def dropped_count(self):
+        return self.metrics.counters["merged"] + self.metrics.counters["overflow"]
+
+    @property
+    def on_reply(self):
+        return self.worker.on_reply
+
+    @on_reply.setter
+    def on_reply(self, function):
+        self.worker.on_reply = function
+
+    def record(self, path):
+        # start appending everything that gets sent to a session log, ReplayPlayer can play it back without maya
+        self.stop_recording()
+        self.worker.recorder = SessionLog.Recorder(path)
+
+    def stop_recording(self):
+        # returns how many requests got recorded, None if there was no recording
+        recorder = self.worker.recorder
+        if recorder is None:
+            return None
+        self.worker.recorder = None
+        recorder.close()
+        return recorder.count
+
+    @property
+    def primary(self):
+        clients = self.worker.clients
+        return clients[0] if clients else None
+
+    def set_clients(self, hosts):
+        """send to these (host, port, limit) replay clients from now on. Gets and everything that needs a reply follow
+        the primary right away, the worker swaps its clients once it gets to it"""
+        ReplayApiData.set_clients(hosts)
+        self.worker.configure.emit(list(ReplayApiData.clients))
+
+    @property
+    def link_up(self):
+        # whether any game answers, while none does live updates are pointless and only get merged
+        return any(client.breaker.allowed for client in self.worker.clients)
+
+    @staticmethod
+    def client_state(client):
+        breaker = client.breaker
+        if breaker.state == Breaker.DOWN:
+            return "down, retry in {:.0f}s".format(math.ceil(breaker.retry_in()))
+        return breaker.state
+
+    def link_state(self):
+        clients = self.worker.clients
+        if not clients:
+            return Breaker.PROBING
+        if len(clients) == 1:
+            return self.client_state(clients[0])
+        return "{} of {} up".format(sum(client.breaker.allowed for client in clients), len(clients))
+
+    def client_stats(self):
+        # one entry per replay client, latency is the smoothed render latency in seconds
+        return [{
+            "name": client.name,
+            "state": self.client_state(client),
+            "sent": sum(client.sent.values()),
+            "merged": sum(client.merged.values()),
+            "latency": client.latency.get("render")
+        } for client in self.worker.clients]
+
+    def busy(self):
+        return bool(self.frames or any(client.busy for client in self.worker.clients))
+
+    def stats(self):
+        return {
+            "queue": len(self.frames),
+            "sent": self.sent_count,
+            "dropped": self.dropped_count,
+            "link": self.link_state()
+        }
+
+
+class TickScheduler(object):
+    """drives the live link's timer callback. In adaptive mode it watches how quickly the game answers and how many
+    frames had to be merged because the last one was still on its way, then raises or lowers the tick rate between
+    min_rate and max_rate. Changing the rate only swaps the timer callback, the link itself keeps running. With
+    several replay clients the rate follows the primary one, the others merge whatever they can't keep up with"""
+    def __init__(self, sender, function, rate=60, min_rate=10, adaptive=True, interval=1000, url="render"):
+        self.sender = sender
+        self.function = function
+        self.url = url
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.adaptive = adaptive
+        # replies per second the game accepted during the last measurement
+        self.acked_rate = 0.0
+        self.callback = None
+        self.counters = None
+
+        self.timer = QtCore.QTimer()
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.adapt)
+
+    @property
+    def running(self):
+        return self.callback is not None
+
+    def start(self):
+        self.rate = self.max_rate
+        self.register()
+        self.set_adaptive(self.adaptive)
+
+    def stop(self):
+        self.timer.stop()
+        if self.callback is not None:
+            OpenMaya.MMessage.removeCallback(self.callback)
+            self.callback = None
+
+    def register(self):
+        # swap the timer callback for one with the new period, the next tick simply comes at the new rate
+        if self.callback is not None:
+            OpenMaya.MMessage.removeCallback(self.callback)
+        self.callback = OpenMaya.MTimerMessage.addTimerCallback(1.0 / self.rate, self.tick)
+
+    def tick(self, *args):
+        # don't even read maya while the game is gone, the first tick after it's back sends the current state
+        if not self.sender.link_up:
+            self.sender.metrics.count("suspended")
+            return
+        self.function()
+
+    def set_adaptive(self, adaptive):
+        self.adaptive = adaptive
+        if not adaptive:
+            self.timer.stop()
+            self.set_rate(self.max_rate)
+        elif self.running:
+            self.counters = self.snapshot()
+            self.timer.start()
+
+    def set_bounds(self, min_rate, max_rate):
+        self.min_rate = min(min_rate, max_rate)
+        self.max_rate = max_rate
+        # without adapting the rate simply follows the target
+        self.set_rate(self.rate if self.adaptive else max_rate)
+
+    def set_rate(self, rate):
+        rate = max(self.min_rate, min(self.max_rate, int(round(rate))))
+        if rate == self.rate:
+            return
+        self.rate = rate
+        if self.running:
+            self.register()
+
+    def snapshot(self):
+        client = self.sender.primary
+        if client is None:
+            return time.time(), None, 0, 0
+        return time.time(), client, client.replies[self.url], client.merged[self.url]
+
+    def adapt(self):
+        now, client, replies, merged = counters = self.snapshot()
+        last_time, last_client, last_replies, last_merged = self.counters
+        self.counters = counters
+        replies -= last_replies
+        merged -= last_merged
+        self.acked_rate = replies / max(now - last_time, 1e-6)
+        # nothing got sent, e.g. the camera didn't move, or the primary client changed, so there's nothing to learn
+        if client is None or client is not last_client or not replies + merged:
+            return
+        latency = client.latency.get(self.url)
+        if latency is None:
+            return
+        if merged > 0.1 * (replies + merged):
+            # the game can't keep up and frames get merged before they go out, drop to what it actually accepts
+            self.set_rate(min(self.rate * 0.8, self.acked_rate * 1.1))
+        elif latency * self.rate < 0.5:
+            # every frame arrives well before the next one, so there's room for more
+            self.set_rate(self.rate * 1.25 + 1)
+
+
 class Requests(object):
     def __init__(self):
         super(Requests, self).__init__()
 
-        # use qt for http requests, type has to be set to application/json
-        self.request = QtNetwork.QNetworkRequest()
-        self.request.setHeader(QtNetwork.QNetworkRequest.ContentTypeHeader, "application/json")
-        self.manager = QtNetwork.QNetworkAccessManager()
+        # use qt for http requests, all instances share the same sender
+        self.sender = Sender.instance()
+        self.manager = self.sender.manager
+        self.frame = self.sender.frame
 
         # grab dictionary template
         self.render = ReplayApiData.render
@@ -44,10 +794,13 @@ class Requests(object):
         self.fov = ReplayApiData.fov
 
     # method for get requests
-    def get(self, url):
-        # need to change the url to grab values
-        self.request.setUrl(QtCore.QUrl(ReplayApiData.urls[url]))
-        reply = self.manager.get(self.request)
+    def get(self, url, pipelined=False):
+        # need to change the url to grab values. Pipelined gets may share a connection with the ones before them
+        # instead of waiting for their answers
+        request = self.sender.request(url)
+        if pipelined:
+            request.setAttribute(QtNetwork.QNetworkRequest.HttpPipeliningAllowedAttribute, True)
+        reply = self.manager.get(request)
         reply.ignoreSslErrors()
         return reply
 
@@ -59,47 +812,185 @@ class Requests(object):
             "playback": self.playback,
             "fov": self.fov
         }
-        self.request.setUrl(QtCore.QUrl(ReplayApiData.urls[url]))
-        # we need to do a post request with our data as json
-        if options is not None:
-            reply = self.manager.post(self.request, json.dumps(options))
+        # we need to do a post request with our data as json, the sender decides when it actually goes out
+        if options is None and url == "playback":
+            # the full playback template has its own shape, so it doesn't need to go through json
+            self.sender.post(url, (self.playback["paused"], self.playback["speed"], self.playback["time"]),
+                             "playback")
+        elif options is not None:
+            self.sender.post(url, options)
         else:
-            reply = self.manager.post(self.request, json.dumps(data_dict[url]))
-        # league client is using a self-signed certificate which will throw an ssl error, simply ignore it
+            self.sender.post(url, data_dict[url])
+
+    def post_reply(self, url, data):
+        """post straight from the main thread and hand back the reply, for when the caller has to know that the game
+        got exactly this request. Nothing gets merged, data is either a dictionary or an already encoded body"""
+        if isinstance(data, dict):
+            data = json.dumps(data)
+        if not isinstance(data, bytes):
+            data = data.encode("utf-8")
+        reply = self.manager.post(self.sender.request(url), data)
         reply.ignoreSslErrors()
+        return reply
+
+
+def node_name(obj):
+    # the name the ui shows for a node, namespaced but without the leading colon of the root namespace
+    name = OpenMaya.MFnDependencyNode(obj).absoluteName()
+    return name[1:] if name.startswith(":") else name
+
+
+class LinkedCamera(object):
+    """a camera the live link reads from, resolved once up front so switching between the cameras of a cut list
+    during a tick only costs a lookup. Raises a RuntimeError if the camera doesn't exist"""
+    def __init__(self, name):
+        sel_list = OpenMaya.MSelectionList()
+        sel_list.add(name)
+        dag_path = sel_list.getDagPath(0)
+        self.name = name
+        self.fn = OpenMaya.MFnTransform(dag_path)
+        self.handle = OpenMaya.MObjectHandle(dag_path.node())
+        # the output plugs of its leagueDoF node, if it has one
+        try:
+            output = OpenMaya.MFnDependencyNode(LeagueDoF.find_dof(dag_path.node())).findPlug("dof", False)
+        except RuntimeError:
+            self.dof = []
+        else:
+            self.dof = [output.child(i) for i in range(output.numChildren())]
 
 
 # noinspection PyUnusedLocal
 class MayaToLeagueReplay(Requests):
-    def __init__(self):
+    def __init__(self, epsilon=1e-4):
         super(MayaToLeagueReplay, self).__init__()
+        # any change smaller than this is treated as noise, so a camera that didn't move is never sent again
+        self.epsilon = epsilon
+        self.last = None
+
+        """resolving the camera through a selection list every tick is expensive, so we do it once and keep the
+        function set around. The function set follows the node's dag path, so a rename only changes the name we
+        compare against, only deleting the node invalidates it"""
+        self.name = None
+        self.camera = None
+        self.callbacks = []
+        # name of a camera that couldn't be found or got deleted, it doesn't get looked up again every tick
+        self.missing = None
+        # optional functions that get called with the new name when the linked camera got renamed and with the name
+        # when it got deleted or couldn't be found
+        self.on_renamed = None
+        self.on_lost = None
+
+        # optional cut list, while the current frame is inside one of its cuts that cut's camera gets linked instead
+        self.cuts = None
+        self.linked = []
+
+    def set_cuts(self, cuts):
+        # one LinkedCamera per cut in the cut list's order, cuts that share a camera share the instance
+        cameras = {}
+        for name in cuts.unique_cameras():
+            cameras[name] = LinkedCamera(name)
+        self.linked = [cameras[name] for name in cuts.cameras]
+        self.cuts = cuts if len(cuts) else None
+        self.last = None
+        self.frame.last_dof = None
+
+    def cut_camera(self):
+        # the linked camera of the current frame, None if there is no cut list or the frame is between two cuts
+        if self.cuts is None:
+            return None
+        index = self.cuts.index(OpenMayaAnim.MAnimControl.currentTime().value)
+        if index is None or not self.linked[index].handle.isValid():
+            return None
+        return self.linked[index]
+
+    def resolve(self, name):
+        self.cleanup()
+        try:
+            self.camera = LinkedCamera(name)
+        except (RuntimeError, TypeError):
+            self.lost(name)
+            return False
+        obj = self.camera.handle.object()
+        self.name = name
+        self.last = None
+        self.callbacks = [OpenMaya.MNodeMessage.addNameChangedCallback(obj, self.renamed),
+                          OpenMaya.MNodeMessage.addNodeAboutToDeleteCallback(obj, self.deleted)]
+        return True
+
+    def renamed(self, obj, old_name, *args):
+        # maya renames nodes while they get created or duplicated, those aren't ours to follow
+        if self.camera is None or not old_name:
+            return
+        self.name = self.camera.name = node_name(obj)
+        if self.on_renamed is not None:
+            self.on_renamed(self.name)
+
+    def deleted(self, *args):
+        # don't remove the callbacks in here since we are still inside of one, the next resolve will take care of it
+        if self.camera is not None:
+            self.lost(self.name)
+        self.invalidate()
+
+    def lost(self, name):
+        self.missing = name
+        if self.on_lost is not None:
+            self.on_lost(name)
+
+    def invalidate(self, *args):
+        self.name = None
+        self.camera = None
+
+    def cleanup(self):
+        if self.callbacks:
+            OpenMaya.MMessage.removeCallbacks(self.callbacks)
+        self.callbacks = []
+        self.missing = None
+        self.invalidate()
 
     def get_pos(self, camera):
-        # get currently selected object via the api - just a temporary solution
-        sel_list = OpenMaya.MSelectionList()
-        sel_list.add(camera.text())
-        obj = sel_list.getDependNode(0)
-
-        # grab transform values, x has to be flipped because the in-game map is flipped along the y axis
-        transform = OpenMaya.MFnTransform(obj).translation(1)
-        self.render["cameraPosition"]["x"] = transform[0] * -1
-        self.render["cameraPosition"]["y"] = transform[1]
-        self.render["cameraPosition"]["z"] = transform[2]
-
-        # grab euler rotation and change rotation order to zxy to be compatible with league
-        euler = OpenMaya.MFnTransform(obj).rotation().reorder(2)
-        # convert euler to angles
-        angles = [math.degrees(angle) for angle in (euler.x, euler.y, euler.z)]
-        # camera in league is flipped, therefore we need to apply x to y as well as multiplying them by -1 and
-        # adding 180 to X
-        self.render["cameraRotation"]["x"] = (angles[1] + 180) * -1
-        self.render["cameraRotation"]["y"] = angles[0] * -1
-        self.render["cameraRotation"]["z"] = angles[2]
+        # only look the camera up again if it changed since the last tick, a camera that is gone stays gone until
+        # another one gets linked
+        if self.camera is None or camera.text() != self.name:
+            if camera.text() == self.missing or not self.resolve(camera.text()):
+                return None
+        return self.read(self.camera.fn)
+
+    def read(self, fn):
+        # translate, rotate and rotate order of the camera, None if it didn't move since the last tick
+        start = Metrics.clock()
+        transform = fn.translation(OpenMaya.MSpace.kTransform)
+        euler = fn.rotation()
+        self.sender.metrics.record("read", Metrics.clock() - start)
+        # check if anything changed before doing any of the conversion work
+        values = (transform[0], transform[1], transform[2], euler.x, euler.y, euler.z)
+        if self.last is not None and max(abs(a - b) for a, b in zip(values, self.last)) <= self.epsilon:
+            self.sender.metrics.count("skipped")
+            return None
+        self.last = values
+        # everything else happens on the sender thread
+        return values + (euler.order,)
 
     # method for getting camera values
     def set_pos(self, camera, *args, **kwargs):
-        self.get_pos(camera)
-        self.post("render")
+        # only send the camera if it actually moved, whatever else changed since the last tick goes with it
+        linked = self.cut_camera()
+        if linked is None:
+            frame = self.get_pos(camera)
+            # the dof gets read in the same tick as the camera, so a frame never mixes values of different frames
+            if self.camera is not None:
+                self.read_dof(self.camera)
+        else:
+            frame = self.read(linked.fn)
+            self.read_dof(linked)
+        if frame is not None:
+            self.frame.set("camera", frame)
+        self.frame.flush()
+
+    def read_dof(self, linked):
+        # while the link ticks the dof is read here, the DoF class only covers edits while it's idle
+        if not linked.dof:
+            return
+        self.frame.set_dof([plug.asFloat() for plug in linked.dof])
 
     # there's no need to instantiate the class for this method, so just mark it as static
     @staticmethod
@@ -109,100 +1000,571 @@ class MayaToLeagueReplay(Requests):
         current_time = OpenMaya.MTime(data["time"], 3)
         OpenMayaAnim.MAnimControl.setMaxTime(length)
         OpenMayaAnim.MAnimControl.setCurrentTime(current_time)
+        reply.deleteLater()
 
 
 # noinspection PyUnusedLocal
 class DoF(Requests):
+    """the dof math lives in the leagueDoF node of the createCamera plug-in, so all we do here is read its output
+    plug whenever it could have changed. Reads are deferred until maya is idle, so no matter how many inputs got
+    dirty during a frame there's only ever one read and one request. While the live link ticks, every tick reads the
+    dof together with the camera instead"""
     def __init__(self, obj):
         super(DoF, self).__init__()
-        self.start = None
-        dag = OpenMaya.MFnDagNode(obj)
-        # we need to get all of the attributes, we could have also used a container but I chose not to
-        self.fp = dag.findPlug("focalPoint", False)
-        self.w = dag.findPlug("width", False)
-        self.n = dag.findPlug("far", False)
-        self.f = dag.findPlug("near", False)
-        self.old_width = dag.findPlug("oldWidth", False)
-        self.old_fp = dag.findPlug("oldMid", False)
-        self.fov = dag.findPlug("fov", False)
-
-        self.last_fov = -1
-
-        self.timeCallback = OpenMaya.MDGMessage.addForceUpdateCallback(self.time_update)
-        self.attrCallback = OpenMaya.MNodeMessage.addAttributeChangedCallback(obj, self.set_attrs)
+        # raises a RuntimeError if the camera wasn't created by leagueCam
+        self.node = LeagueDoF.find_dof(obj)
+        self.handle = OpenMaya.MObjectHandle(self.node)
+        output = OpenMaya.MFnDependencyNode(self.node).findPlug("dof", False)
+        self.outputs = [output.child(i) for i in range(output.numChildren())]
+        self.scheduled = False
+
+        # dirty plug messages cover interactive edits, time changes cover playback where nothing gets dirtied
+        self.callbacks = [OpenMaya.MNodeMessage.addNodeDirtyPlugCallback(self.node, self.schedule),
+                          OpenMaya.MDGMessage.addTimeChangeCallback(self.schedule)]
 
     def cleanup(self):
-        OpenMaya.MMessage.removeCallback(self.attrCallback)
-        OpenMaya.MMessage.removeCallback(self.timeCallback)
-
-    def time_update(self, *args):
-        context = OpenMaya.MDGContext(OpenMayaAnim.MAnimControl.currentTime())
-        attr_dict = {
-            "old_width": self.old_width.asFloat(context),
-            "old_fp": self.old_fp.asFloat(context),
-            "fp": self.fp.asFloat(context),
-            "width": self.w.asFloat(context),
-            "near": self.n.asFloat(context),
-            "far": self.f.asFloat(context),
-            "fov": self.fov.asFloat(context)
-        }
-        self.convert_dict(attr_dict)
-
-    # set attrs
-    def set_attrs(self, obj, plug, *args):
-        # limit the callback rate a bit by making sure some time has passed since the last call
-        if time.time() == self.start:
-            return
-        self.start = time.time()
-        # create dict with attrs for readability
-        attr_dict = {
-            "old_width": self.old_width.asFloat(),
-            "old_fp": self.old_fp.asFloat(),
-            "fp": self.fp.asFloat(),
-            "width": self.w.asFloat(),
-            "near": self.n.asFloat(),
-            "far": self.f.asFloat(),
-            "fov": self.fov.asFloat()
-        }
-        # near = mid - width + (near - mid + last_width)
-        near = attr_dict["fp"] - attr_dict["width"] + (attr_dict["near"] - attr_dict["fp"] + attr_dict["old_width"])
-        # far = mid + width + (near - mid - last_width)
-        far = attr_dict["fp"] + attr_dict["width"] + (attr_dict["far"] - attr_dict["fp"] - attr_dict["old_width"])
-
-        # check which attr was changed to avoid overload and recursion
-        if plug == self.fp:
-            diff = attr_dict["fp"] - attr_dict["old_fp"]
-
-            n = attr_dict["near"] + diff
-            attr_dict["near"] = n
-
-            f = attr_dict["far"] + diff
-            attr_dict["far"] = f
-
-            self.n.setFloat(n)
-            self.f.setFloat(f)
-            self.old_fp.setFloat(attr_dict["fp"])
-        elif plug == self.w:
-            self.n.setFloat(near)
-            attr_dict["near"] = near
-
-            self.f.setFloat(far)
-            self.old_width.setFloat(attr_dict["width"])
-        elif plug == self.fov:
-            if plug.asFloat() == self.last_fov:
-                return
-            else:
-                self.last_fov = plug.asFloat()
-            print plug.asFloat()
-            ReplayApiData.fov["fieldOfView"] = plug.asFloat()
-            self.post("render", ReplayApiData.fov)
-        self.convert_dict(attr_dict)
+        OpenMaya.MMessage.removeCallbacks(self.callbacks)
+        self.callbacks = []
+
+    def schedule(self, *args):
+        if self.scheduled:
+            return
+        self.scheduled = True
+        maya.utils.executeDeferred(self.update)
+
+    def update(self):
+        self.scheduled = False
+        if self.frame.ticking or not self.handle.isValid():
+            return
+        start = Metrics.clock()
+        values = [plug.asFloat() for plug in self.outputs]
+        self.sender.metrics.record("read", Metrics.clock() - start)
+        self.frame.set_dof(values)
 
     def convert_dict(self, attr_dict):
-        data = {
-            "depthOfFieldFar": attr_dict["far"] * 10,
-            "depthOfFieldMid": attr_dict["fp"] * 10,
-            "depthOfFieldNear": attr_dict["near"] * 10,
-            "fieldOfView": attr_dict["fov"]
-        }
-        self.post("render", data)
+        # conversion and serialization happen on the sender thread, the frame only collects the raw values
+        self.frame.set("dof", (attr_dict["near"], attr_dict["fp"], attr_dict["far"]))
+        self.frame.set("fov", (attr_dict["fov"],))
+
+
+class SeekManager(Requests):
+    """seeking in a replay takes hundreds of milliseconds, so every seek goes through here instead of straight to
+    the game. A seek only goes out once no newer one came in for delay ms, then the sender sends it to every replay
+    client, where it aborts the seek that is still on their way. Seeks as well as reads of the replay's time get
+    sequence numbers so a late answer can never move maya back to a time that was already replaced by a newer one"""
+    def __init__(self, delay=100):
+        super(SeekManager, self).__init__()
+        self.metrics = self.sender.metrics
+        self.sequence = 0
+        # values of the seek waiting for the debounce and the read that is on its way
+        self.target = None
+        # seeks replaced while waiting for the debounce, the sender counts them once the next seek goes out
+        self.superseded = 0
+        self.read_reply = None
+
+        self.timer = QtCore.QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.send)
+
+    @property
+    def delay(self):
+        # seconds a seek waits before it goes out
+        return self.timer.interval() / 1000.0
+
+    @property
+    def busy(self):
+        # while a seek hasn't reached the game yet, the replay's time says nothing about where it's going to be
+        return self.target is not None or self.sender.seeking
+
+    def seek(self, seconds, fields=None):
+        # fields are any other playback values that should go along with the time, returns the seek's sequence number
+        self.sequence += 1
+        if self.target is not None:
+            self.superseded += 1
+        self.target = dict(fields or {})
+        self.target["time"] = seconds
+        self.timer.start()
+        return self.sequence
+
+    def send(self):
+        if self.target is None:
+            return
+        data, self.target = self.target, None
+        self.metrics.count("seeks")
+        superseded, self.superseded = self.superseded, 0
+        self.sender.seek(data, superseded)
+
+    def read(self):
+        """set maya's time range and current time to the replay's. Only the answer to the latest read gets applied,
+        and none at all if a seek came in since, the game's answer would be from before that seek"""
+        self.sequence += 1
+        if self.read_reply is not None:
+            self.read_reply.abort()
+        reply = self.read_reply = self.get("playback")
+        reply.finished.connect(partial(self.read_finished, self.sequence, reply))
+
+    def read_finished(self, sequence, reply):
+        if reply is self.read_reply:
+            self.read_reply = None
+        if sequence != self.sequence or reply.error() != QtNetwork.QNetworkReply.NoError:
+            reply.deleteLater()
+            return
+        MayaToLeagueReplay.update_maya(reply)
+
+    def stop(self):
+        # a seek that already went out is left to finish, the game is on its way there anyway
+        self.timer.stop()
+        self.target = None
+        if self.read_reply is not None:
+            self.read_reply.abort()
+
+
+class ClockSync(Requests):
+    """keeps the replay in step with maya while it plays back. The replay's clock gets polled at a low rate, the
+    round trip time tells us how old its answer is, and small speed adjustments pull it back towards maya's time.
+    Only if it drifted further than seek_threshold (seconds) it gets a hard seek through the SeekManager, since those
+    take a while"""
+    def __init__(self, seeks=None, interval=500, seek_threshold=0.25, gain=0.5, max_adjust=0.1):
+        super(ClockSync, self).__init__()
+        self.seeks = seeks or SeekManager()
+        self.seek_threshold = seek_threshold
+        # how strongly the speed reacts to the error and the most it may differ from the normal speed (fraction)
+        self.gain = gain
+        self.max_adjust = max_adjust
+        # smoothed round trip time and the last measured offset between the clocks, both in seconds
+        self.rtt = None
+        self.offset = None
+        self.speed = None
+        self.reply = None
+        self.sent = None
+
+        self.timer = QtCore.QTimer()
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.poll)
+
+    @staticmethod
+    def base_speed():
+        # 0 means play every frame, maya still aims for real time then
+        return OpenMayaAnim.MAnimControl.playbackSpeed() or 1.0
+
+    @staticmethod
+    def deadband():
+        # maya's time only moves in whole frames, anything below half a frame is just that
+        return OpenMaya.MTime(0.5, OpenMaya.MTime.uiUnit()).asUnits(OpenMaya.MTime.kSeconds)
+
+    def start(self):
+        self.speed = None
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+        # leave the replay at the normal speed again
+        if self.speed is not None and self.speed != self.base_speed():
+            self.post("playback", {"speed": self.base_speed()})
+        self.speed = None
+
+    def poll(self):
+        # never stack polls, if the last one didn't come back yet the game is busy anyway
+        if self.reply is not None or not self.sender.link_up:
+            return
+        self.sent = time.time()
+        self.reply = self.get("playback")
+        self.reply.finished.connect(self.finished)
+
+    def finished(self):
+        reply, self.reply = self.reply, None
+        rtt = time.time() - self.sent
+        maya_time = OpenMayaAnim.MAnimControl.currentTime().asUnits(OpenMaya.MTime.kSeconds)
+        if reply.error() != QtNetwork.QNetworkReply.NoError:
+            reply.deleteLater()
+            return
+        data = json.loads(reply.readAll().data().decode())
+        reply.deleteLater()
+        # while a seek is on its way the replay's clock is about to jump, there's nothing to correct yet
+        if not self.timer.isActive() or self.seeks.busy:
+            return
+
+        self.rtt = rtt if self.rtt is None else self.rtt + 0.2 * (rtt - self.rtt)
+        # the answer describes the replay's clock about half a round trip ago
+        league_time = data["time"]
+        if not data["paused"]:
+            league_time += rtt / 2 * data["speed"]
+        self.offset = maya_time - league_time
+        self.correct(maya_time)
+
+    def correct(self, maya_time):
+        base = self.base_speed()
+        if abs(self.offset) > self.seek_threshold:
+            # too far off to catch up smoothly, seek to where maya will be once the request arrives
+            self.seeks.seek(maya_time + (self.rtt / 2 + self.seeks.delay) * base, {"speed": base})
+            self.speed = base
+            return
+        if abs(self.offset) < self.deadband():
+            speed = base
+        else:
+            # the replay is behind if the offset is positive, so speed it up a little and vice versa
+            adjust = max(-self.max_adjust, min(self.max_adjust, self.gain * self.offset))
+            speed = base * (1 + adjust)
+        if self.speed is None or abs(speed - self.speed) > 1e-3:
+            self.post("playback", {"speed": speed})
+            self.speed = speed
+
+
+# noinspection PyUnusedLocal
+class SequencePush(Requests):
+    """instead of streaming every tick, bake the linked camera into keyframe tracks and upload them to the replay in
+    one go, the game then interpolates the camera by itself while the time link drives playback. After an edit only
+    the frames that actually changed get baked again before the sequence is uploaded. With a cut list the whole edit
+    gets baked, with camera filling the gaps between cuts. With a tolerance the tracks get reduced to the keys they
+    need before every upload"""
+    def __init__(self, camera, cuts=None, tolerance=None, delay=250):
+        super(SequencePush, self).__init__()
+        import Sequence
+        self.bake = Sequence.bake(camera, cuts)
+        self.tolerance = tolerance
+        self.ratio = 1.0
+        self.start = OpenMayaAnim.MAnimControl.minTime().value
+        self.end = OpenMayaAnim.MAnimControl.maxTime().value
+        self.seconds, self.values = self.bake.evaluate(self.start, self.end)
+        self.dirty = None
+
+        # edits come in bursts while dragging keys, so wait until things calm down before baking
+        self.timer = QtCore.QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.update)
+
+        self.keys = {}
+        self.exact = True
+        self.track()
+        self.callbacks = [OpenMayaAnim.MAnimMessage.addAnimCurveEditedCallback(self.curves_edited)]
+        self.callbacks += [OpenMaya.MNodeMessage.addAttributeChangedCallback(obj, self.attr_changed)
+                           for obj in self.bake.objs]
+
+    def track(self):
+        """remember the keys of every curve that drives the camera so we can tell which frames an edit touched. If
+        anything else drives it (constraints, expressions...) we can't know that and rebake everything instead"""
+        self.keys = {}
+        self.exact = True
+        for plug in self.bake.inputs:
+            source = plug.source()
+            if source.isNull:
+                continue
+            curve = source.node()
+            if curve.hasFn(OpenMaya.MFn.kAnimCurve) and OpenMayaAnim.MFnAnimCurve(curve).isTimeInput:
+                self.keys[OpenMaya.MObjectHandle(curve).hashCode()] = self.snapshot(curve)
+            else:
+                self.exact = False
+
+    @staticmethod
+    def snapshot(curve):
+        fn = OpenMayaAnim.MFnAnimCurve(curve)
+        unit = OpenMaya.MTime.uiUnit()
+        return [(fn.input(i).asUnits(unit), fn.value(i), fn.getTangentXY(i, True), fn.getTangentXY(i, False))
+                for i in range(fn.numKeys)]
+
+    def changed_range(self, old, new):
+        # strip the keys that are the same at the start and the end, whatever is left in between got edited
+        prefix = 0
+        while prefix < min(len(old), len(new)) and old[prefix] == new[prefix]:
+            prefix += 1
+        if prefix == len(old) == len(new):
+            return None
+        suffix = 0
+        while suffix < min(len(old), len(new)) - prefix and old[-1 - suffix] == new[-1 - suffix]:
+            suffix += 1
+        # the curve changes up to the neighbouring keys, or everywhere if the edit was at either end of the curve
+        start = old[prefix - 1][0] if prefix else self.start
+        end = new[len(new) - suffix][0] if suffix else self.end
+        return start, end
+
+    def curves_edited(self, curves, *args):
+        for curve in curves:
+            handle = OpenMaya.MObjectHandle(curve).hashCode()
+            if handle in self.keys:
+                keys = self.snapshot(curve)
+                changed = self.changed_range(self.keys[handle], keys)
+                self.keys[handle] = keys
+                if changed is not None:
+                    self.mark(*changed)
+            elif not self.exact:
+                self.mark(self.start, self.end)
+
+    def attr_changed(self, msg, plug, *args):
+        if msg & (OpenMaya.MNodeMessage.kConnectionMade | OpenMaya.MNodeMessage.kConnectionBroken):
+            self.track()
+            self.mark(self.start, self.end)
+        elif msg & OpenMaya.MNodeMessage.kAttributeSet and not plug.isDestination and plug in self.bake.inputs:
+            # a static value changed, which affects every frame
+            self.mark(self.start, self.end)
+
+    def mark(self, start, end):
+        start = max(self.start, self.start + math.floor(start - self.start))
+        end = min(self.end, self.start + math.ceil(end - self.start))
+        if self.dirty is not None:
+            start = min(start, self.dirty[0])
+            end = max(end, self.dirty[1])
+        self.dirty = start, end
+        self.timer.start()
+
+    def update(self):
+        if self.dirty is None:
+            return
+        start, end = self.dirty
+        self.dirty = None
+        seconds, values = self.bake.evaluate(start, end)
+        index = int(start - self.start)
+        self.values[index:index + len(values)] = values
+        self.push()
+
+    def push(self):
+        import Sequence
+        # the endpoint replaces the whole sequence, so the spliced tracks get sent as one document
+        tracks = self.bake.to_tracks(self.seconds, self.values, self.tolerance)
+        self.ratio = Sequence.compression(len(self.seconds), tracks)
+        self.post("sequence", tracks)
+        return len(self.seconds)
+
+    def cleanup(self):
+        self.timer.stop()
+        OpenMaya.MMessage.removeCallbacks(self.callbacks)
+        self.callbacks = []
+        # an empty sequence hands the camera back to the live link
+        self.post("sequence", {})
+
+
+class FrameStepper(Requests):
+    """offline render mode. The replay gets paused and then stepped through the frame range one frame at a time, each
+    frame's time and camera are sent and the next frame only starts once the game acknowledged both and finished
+    seeking to the frame's time, so every replay frame matches its maya frame exactly. While the game works on a frame
+    the next one already gets evaluated and encoded. on_progress is called with (frames done, frame count, frames per
+    second) and on_finished with a result dictionary once the range is done, failed or got stopped"""
+    def __init__(self, camera, cuts=None, start=None, end=None, settle=0, poll_interval=10, seek_timeout=10.0,
+                 tolerance=0.001):
+        super(FrameStepper, self).__init__()
+        # default to the playback range
+        if start is None:
+            start = OpenMayaAnim.MAnimControl.minTime().value
+        if end is None:
+            end = OpenMayaAnim.MAnimControl.maxTime().value
+        import Sequence
+        self.bake = Sequence.bake(camera, cuts)
+        self.encoder = FrameEncoder.FrameEncoder()
+        self.frames = [start + i for i in range(int(end - start) + 1)]
+        # extra milliseconds to wait after the acknowledgements, in case the game needs a moment to show the frame
+        self.settle = settle
+        # how often (milliseconds) the game gets asked whether it's done seeking, how long (seconds) a seek may take
+        # and how far (seconds) the time it reports may be off from the frame's
+        self.poll_interval = poll_interval
+        self.seek_timeout = seek_timeout
+        self.tolerance = tolerance
+        self.on_progress = None
+        self.on_finished = None
+
+        # frames that are done, the one the game is working on and the prepared bodies of the one after it
+        self.index = 0
+        self.current = None
+        self.next = None
+        # time of the frame the game is working on and when it was sent
+        self.target = None
+        self.sent = None
+        self.replies = []
+        self.error = None
+        self.started = None
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self.index = 0
+        self.current = None
+        self.error = None
+        self.started = time.time()
+        self.wait([self.post_reply("playback", {"paused": True})])
+        # the first frame gets ready while the pause is on its way
+        self.next = self.prepare(self.frames[0])
+
+    def stop(self):
+        if self.running:
+            self.finish()
+
+    def prepare(self, frame):
+        # time and request bodies of a single frame, (seconds, playback, render)
+        seconds, rows, has_dof = self.bake.render(frame, frame)
+        row = tuple(rows[0].tolist())
+        try:
+            if has_dof[0]:
+                render = self.encoder.encode(("camera", "dof", "fov"), row)
+            else:
+                render = self.encoder.encode(("camera",), row[:6])
+        except ValueError:
+            # stops the range once the replies of the frame that is on its way are in
+            self.error = "Frame {:g} has nan or infinite values".format(frame)
+            return None
+        return float(seconds[0]), json.dumps({"time": float(seconds[0]), "paused": True}), render
+
+    def wait(self, replies):
+        self.replies = replies
+        for reply in replies:
+            reply.finished.connect(partial(self.acknowledged, reply))
+
+    def acknowledged(self, reply):
+        if reply.error() != QtNetwork.QNetworkReply.NoError:
+            self.error = reply.errorString()
+        reply.readAll()
+        reply.deleteLater()
+        if reply in self.replies:
+            self.replies.remove(reply)
+        if self.replies or not self.running:
+            return
+        if self.error is not None:
+            self.finish()
+            return
+        if self.current is None:
+            # the pause at the start, there's no frame to wait for
+            self.next_frame()
+        else:
+            # a 200 only means the game accepted the seek, the frame is there once it's done seeking
+            self.poll()
+
+    def poll(self):
+        if not self.running:
+            return
+        reply = self.get("playback")
+        self.replies = [reply]
+        reply.finished.connect(partial(self.polled, reply))
+
+    def polled(self, reply):
+        if reply.error() != QtNetwork.QNetworkReply.NoError:
+            self.error = reply.errorString()
+            state = {}
+        else:
+            try:
+                state = json.loads(reply.readAll().data().decode())
+            except ValueError:
+                self.error = "Invalid playback state"
+                state = {}
+        reply.deleteLater()
+        if reply in self.replies:
+            self.replies.remove(reply)
+        if not self.running:
+            return
+        if self.error is not None:
+            self.finish()
+            return
+        if not state.get("seeking", False) and abs(state.get("time", float("inf")) - self.target) <= self.tolerance:
+            self.index = self.current + 1
+            self.current = None
+            self.report()
+            self.next_frame()
+        elif time.time() - self.sent > self.seek_timeout:
+            self.error = "Replay didn't reach {:.3f}s".format(self.target)
+            self.finish()
+        else:
+            QtCore.QTimer.singleShot(self.poll_interval, self.poll)
+
+    def next_frame(self):
+        if self.settle:
+            QtCore.QTimer.singleShot(self.settle, self.step)
+        else:
+            self.step()
+
+    def step(self):
+        if not self.running:
+            return
+        if self.index == len(self.frames):
+            self.finish()
+            return
+        self.target, playback, render = self.next
+        self.current = self.index
+        self.sent = time.time()
+        self.wait([self.post_reply("playback", playback), self.post_reply("render", render)])
+        # the game is busy with this frame now, use the time to get the next one ready
+        following = self.index + 1
+        self.next = self.prepare(self.frames[following]) if following < len(self.frames) else None
+
+    @property
+    def fps(self):
+        elapsed = time.time() - self.started
+        return self.index / elapsed if elapsed > 0 else 0.0
+
+    def report(self):
+        if self.on_progress is not None:
+            self.on_progress(self.index, len(self.frames), self.fps)
+
+    def finish(self):
+        self.running = False
+        result = {"frames": self.index, "count": len(self.frames), "fps": self.fps, "error": self.error}
+        if self.on_finished is not None:
+            self.on_finished(result)
+
+
+class Capture(Requests):
+    """reverse link, records the camera of the replay into a take that gets written as keys on a maya camera. The
+    replay's render state and time are polled at rate per second, with up to depth requests of each on their way at
+    once so a slow answer never costs a sample. Nothing touches maya until the take is finished, replies only get
+    parsed into the take's arrays"""
+    def __init__(self, camera, rate=60, depth=2, length=300):
+        super(Capture, self).__init__()
+        import Sequence
+        self.camera = camera
+        self.depth = depth
+        # room for length seconds of samples up front, the take grows on its own if it runs longer
+        self.take = Sequence.Take(int(rate * length))
+        self.in_flight = collections.Counter()
+        self.replies = set()
+        self.errors = 0
+
+        self.timer = QtCore.QTimer()
+        self.timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self.timer.setInterval(max(int(1000.0 / rate), 1))
+        self.timer.timeout.connect(self.poll)
+
+    @property
+    def running(self):
+        return self.timer.isActive()
+
+    def start(self):
+        self.poll()
+        self.timer.start()
+
+    def poll(self):
+        for url in ("render", "playback"):
+            if self.in_flight[url] >= self.depth:
+                continue
+            self.in_flight[url] += 1
+            reply = self.get(url, pipelined=True)
+            self.replies.add(reply)
+            reply.finished.connect(partial(self.finished, url, Metrics.clock(), reply))
+
+    def finished(self, url, sent, reply):
+        self.in_flight[url] -= 1
+        self.replies.discard(reply)
+        # the game answered somewhere between sending and now, half way is the best guess
+        clock = (sent + Metrics.clock()) / 2
+        error = reply.error()
+        if error != QtNetwork.QNetworkReply.NoError:
+            # aborted replies are the ones stop threw away, not something that went wrong
+            if error != QtNetwork.QNetworkReply.OperationCanceledError:
+                self.errors += 1
+            reply.deleteLater()
+            return
+        data = json.loads(reply.readAll().data().decode())
+        reply.deleteLater()
+        if url == "render":
+            self.take.add_render(clock, data)
+        else:
+            self.take.add_time(clock, data["time"])
+
+    def stop(self):
+        # whatever is still on its way doesn't make it into the take anymore
+        self.timer.stop()
+        for reply in list(self.replies):
+            reply.abort()
+
+    def finish(self):
+        # stops polling and writes the take, returns the samples taken, the keys written and the keys per second
+        import Sequence
+        self.stop()
+        count, rate = Sequence.capture_keys(self.take, self.camera)
+        return len(self.take), count, rate
@@ -0,0 +1,115 @@
+"""timings and counters of the live link. Every stage a frame goes through (reading maya, encoding, waiting for the
+sender, the game's reply) gets its durations recorded into a histogram with fixed buckets, so recording is cheap and
+memory doesn't grow no matter how long the link runs."""
+import bisect
+import collections
+import csv
+import json
+import sys
+import time
+
+# the best clock there is for measuring short durations, python 2 only has time.time
+clock = getattr(time, "perf_counter", time.time)
+
+# stages in the order a frame goes through them
+STAGES = ("read", "encode", "dispatch", "reply")
+COUNTERS = ("sent", "skipped", "merged", "overflow", "http_errors", "tls_errors", "probes", "suspended",
+            "seeks", "superseded", "invalid")
+
+
+class Histogram(object):
+    """durations in seconds, bucketed logarithmically from 1 microsecond to 10 seconds with 8 buckets per decade.
+    Percentiles are only as exact as the buckets, which is about 30% and plenty for telling 1ms from 10ms"""
+    edges = [1e-6 * 10 ** (i / 8.0) for i in range(57)]
+
+    def __init__(self):
+        # the last bucket catches everything above the last edge
+        self.buckets = [0] * (len(self.edges) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.buckets[bisect.bisect_left(self.edges, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, fraction):
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                # upper edge of the bucket, but never more than what was actually measured
+                return min(self.edges[i], self.max) if i < len(self.edges) else self.max
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.mean(),
+            "p50": self.percentile(0.5),
+            "p99": self.percentile(0.99),
+            "max": self.max
+        }
+
+
+class Metrics(object):
+    """shared by the main thread and the sender thread. Each stage and counter is only ever written by one of them
+    and the ui only reads, so no locking is needed. The most recent events are also kept in a ring buffer for dumping
+    a trace"""
+    def __init__(self, trace_size=4096):
+        self.stages = dict((stage, Histogram()) for stage in STAGES)
+        self.counters = collections.Counter()
+        self.trace = collections.deque(maxlen=trace_size)
+        self.started = time.time()
+
+    def record(self, stage, seconds):
+        self.stages[stage].add(seconds)
+        self.trace.append((time.time(), stage, seconds))
+
+    def count(self, counter, amount=1):
+        self.counters[counter] += amount
+
+    def reset(self):
+        self.__init__(self.trace.maxlen)
+
+    def summary(self):
+        return {
+            "uptime": time.time() - self.started,
+            "counters": dict((counter, self.counters[counter]) for counter in COUNTERS),
+            "stages": dict((stage, self.stages[stage].summary()) for stage in STAGES)
+        }
+
+    def bottleneck(self):
+        # the stage with the highest p99, roughly whoever is to blame when a capture stutters
+        stages = [(histogram.percentile(0.99), stage) for stage, histogram in self.stages.items() if histogram.count]
+        return max(stages)[1] if stages else None
+
+    def dump(self, path):
+        """write the summary and the recent trace to path, a .json file gets both, anything else becomes a csv of the
+        trace with one row per recorded event followed by the counters"""
+        trace = list(self.trace)
+        if path.endswith(".json"):
+            data = self.summary()
+            data["trace"] = [{"time": stamp, "stage": stage, "seconds": seconds} for stamp, stage, seconds in trace]
+            with open(path, "w") as f:
+                json.dump(data, f, indent=4)
+            return len(trace)
+        # python 3's csv module wants to handle newlines itself, python 2's wants a binary file
+        with open(path, "w", newline="") if sys.version_info[0] >= 3 else open(path, "wb") as f:
+            writer = csv.writer(f)
+            writer.writerow(("time", "stage", "ms"))
+            for stamp, stage, seconds in trace:
+                writer.writerow(("{:.6f}".format(stamp), stage, "{:.4f}".format(seconds * 1000)))
+            writer.writerow(())
+            for counter in COUNTERS:
+                writer.writerow((counter, self.counters[counter]))
+        return len(trace)
@@ -17,8 +17,64 @@ playback = {
 }
 urls = {
             "render": "https://127.0.0.1:2999/replay/render",
-            "playback": "https://127.0.0.1:2999/replay/playback"
+            "playback": "https://127.0.0.1:2999/replay/playback",
+            "sequence": "https://127.0.0.1:2999/replay/sequence"
 }
 fov = {
     "fieldOfView": 40
 }
+
+
+# requests per endpoint a replay client may have on their way at once, unless the client list says otherwise
+DEFAULT_LIMIT = 1
+# every replay client the live link sends to as (host, port, limit), the first one is the primary that gets read from
+clients = [("127.0.0.1", 2999, DEFAULT_LIMIT)]
+
+
+def client_url(host, port, url):
+    return "https://{}:{}/replay/{}".format(host, port, url)
+
+
+def set_host(host="127.0.0.1", port=2999, limit=DEFAULT_LIMIT):
+    # point the link at a single different replay client, e.g. the local stand-in server in ReplayServer
+    set_clients([(host, port, limit)])
+
+
+def client_entry(host, port, limit=DEFAULT_LIMIT):
+    return host, int(port), int(limit)
+
+
+def set_clients(hosts):
+    """hosts are (host, port) or (host, port, limit). urls always belong to the primary client, that's where gets and
+    everything that needs a reply go"""
+    clients[:] = [client_entry(*host) for host in hosts]
+    for url in urls:
+        urls[url] = client_url(clients[0][0], clients[0][1], url)
+
+
+def parse_clients(text):
+    """(host, port, limit) clients from a comma separated list like "127.0.0.1:2999, 10.0.0.5:3000/3", a missing host
+    means localhost and a missing /limit the DEFAULT_LIMIT of requests in flight. Raises ValueError if an entry isn't
+    host:port with an optional positive limit or the list is empty"""
+    hosts = []
+    for entry in text.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        address, slash, limit = entry.partition("/")
+        host, _, port = address.rpartition(":")
+        if not port.isdigit() or not 0 < int(port) < 65536:
+            raise ValueError("Not a host:port address: {}".format(entry))
+        if slash and (not limit.isdigit() or int(limit) < 1):
+            raise ValueError("Not a request limit: {}".format(entry))
+        # the first entry of a client wins
+        if (host or "127.0.0.1", int(port)) not in [client[:2] for client in hosts]:
+            hosts.append((host or "127.0.0.1", int(port), int(limit) if limit else DEFAULT_LIMIT))
+    if not hosts:
+        raise ValueError("No replay clients given")
+    return hosts
+
+
+def format_clients(hosts):
+    return ", ".join("{}:{}".format(host, port) + ("/{}".format(limit) if limit != DEFAULT_LIMIT else "")
+                     for host, port, limit in hosts)
@@ -0,0 +1,90 @@
+"""plays a session log recorded by the live link back to a replay client with the original timing, no maya needed.
+Works with the real game as well as ReplayServer, runs inside mayapy as well as a regular python:
+
+    python ReplayPlayer.py session.mtlr --port 2999 --speed 1
+    python ReplayPlayer.py session.mtlr --compare received.mtlr
+"""
+import argparse
+import ssl
+import time
+
+try:
+    from http.client import HTTPSConnection
+except ImportError:
+    from httplib import HTTPSConnection
+
+import SessionLog
+
+
+def connection(host, port):
+    # the client uses a self-signed certificate, just like in the live link don't bother verifying it
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return HTTPSConnection(host, port, context=context)
+
+
+def play(path, host="127.0.0.1", port=2999, speed=1.0, endpoints=SessionLog.ENDPOINTS):
+    """send every record of the log to its endpoint, waiting until the same time has passed since the first record as
+    it did while recording. Requests go out one after the other over a single keep-alive connection, if the client is
+    slower than the recording the frames fall behind and that shows up in the returned lateness"""
+    client = connection(host, port)
+    headers = {"Content-Type": "application/json"}
+    sent = 0
+    errors = 0
+    lateness = []
+    start = first = None
+    with SessionLog.Reader(path) as log:
+        for stamp, url, body in log:
+            if url not in endpoints:
+                continue
+            if first is None:
+                first = stamp
+                start = time.time()
+            due = start + (stamp - first) / speed
+            wait = due - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            else:
+                lateness.append(-wait)
+            client.request("POST", "/replay/" + url, body, headers)
+            response = client.getresponse()
+            response.read()
+            sent += 1
+            if response.status != 200:
+                errors += 1
+    client.close()
+    lateness.sort()
+    return {
+        "sent": sent,
+        "errors": errors,
+        "duration": time.time() - start if start is not None else 0.0,
+        "late": len(lateness),
+        "p99_late_ms": lateness[min(int(len(lateness) * 0.99), len(lateness) - 1)] * 1000 if lateness else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play a recorded live link session back to a replay client")
+    parser.add_argument("log", help="session log recorded by the live link")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2999)
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed relative to the recording")
+    parser.add_argument("--endpoints", nargs="+", default=list(SessionLog.ENDPOINTS), choices=SessionLog.ENDPOINTS)
+    parser.add_argument("--compare", help="instead of playing, compare the requests against another log")
+    args = parser.parse_args()
+
+    if args.compare:
+        count, mismatch = SessionLog.compare(args.log, args.compare)
+        if mismatch is None:
+            print("Identical, {} records".format(count))
+        else:
+            print("First difference at record {}".format(mismatch))
+        return
+    result = play(args.log, args.host, args.port, args.speed, args.endpoints)
+    print("Sent {sent} requests in {duration:.2f}s, {errors} errors, {late} late (p99 {p99_late_ms:.2f} ms)".format(
+        **result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""local stand-in for the league replay api, so the link can be tested and benchmarked without a running game.
+It serves /replay/render, /replay/playback and /replay/sequence over https with a self-signed certificate and can
+add artificial latency, jitter and errors to every request. Everything it receives can be recorded to a session log,
+e.g. to compare it with the log the live link recorded. Runs inside mayapy as well as a regular python:
+
+    python ReplayServer.py --port 2999 --latency 5 --jitter 2 --error-rate 0.01
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import ssl
+import threading
+import time
+
+import SessionLog
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+
+# throwaway self-signed certificate, just like the one the league client uses. It only ever protects the local test
+# traffic, so it ships with the repo instead of needing openssl, which windows doesn't have
+CERTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "certs")
+CERT = os.path.join(CERTS, "cert.pem")
+KEY = os.path.join(CERTS, "key.pem")
+
+
+class ReplayState(object):
+    # everything the replay api would remember between requests
+    def __init__(self, length=1800.0, seek_time=0.0):
+        self.lock = threading.Lock()
+        self.render = {
+            "cameraPosition": {"x": 0.0, "y": 0.0, "z": 0.0},
+            "cameraRotation": {"x": 0.0, "y": 0.0, "z": 0.0},
+            "fieldOfView": 40.0,
+            "depthOfFieldNear": 0.0,
+            "depthOfFieldMid": 0.0,
+            "depthOfFieldFar": 0.0
+        }
+        self.sequence = {}
+        self.length = length
+        self.paused = True
+        self.speed = 1.0
+        # playback time is stored as the time at the last change plus the wall clock time it happened at
+        self.time = 0.0
+        self.changed = time.time()
+        # seconds a seek takes, until it's done the replay reports seeking and the time it was at before
+        self.seek_time = seek_time
+        self.seek_done = 0.0
+        self.seek_from = 0.0
+
+    def current_time(self):
+        if self.paused:
+            return self.time
+        return min(self.time + (time.time() - self.changed) * self.speed, self.length)
+
+    def playback(self):
+        seeking = time.time() < self.seek_done
+        return {
+            "length": self.length,
+            "paused": self.paused,
+            "seeking": seeking,
+            "speed": self.speed,
+            "time": self.seek_from if seeking else self.current_time()
+        }
+
+    def update_playback(self, data):
+        # rebase the clock before changing anything so time keeps running continuously
+        current = self.current_time()
+        self.time = float(data.get("time", current))
+        self.changed = time.time()
+        if "time" in data and self.seek_time > 0:
+            self.seek_from = current
+            self.seek_done = self.changed + self.seek_time
+        self.paused = bool(data.get("paused", self.paused))
+        self.speed = float(data.get("speed", self.speed))
+
+
+# noinspection PyPep8Naming
+class ReplayHandler(BaseHTTPRequestHandler):
+    # keep-alive, the same as the real client
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        # headers and body are written separately, without this every reply waits for a delayed ack
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        BaseHTTPRequestHandler.setup(self)
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.handle_request(None)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        if self.server.recorder is not None and self.path.startswith("/replay/"):
+            url = self.path[len("/replay/"):]
+            if url in SessionLog.ENDPOINTS:
+                self.server.recorder.write(time.time(), url, body)
+        try:
+            data = json.loads(body.decode("utf-8")) if body else {}
+        except ValueError:
+            self.reply(400, {"error": "Invalid json"})
+            return
+        self.handle_request(data)
+
+    def handle_request(self, data):
+        server = self.server
+        server.count(self.path)
+        # simulate a slow or busy game
+        delay = server.latency + random.uniform(-server.jitter, server.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        if random.random() < server.error_rate:
+            self.reply(500, {"error": "Simulated error"})
+            return
+
+        state = server.state
+        with state.lock:
+            if self.path == "/replay/render":
+                if data is not None:
+                    state.render.update(data)
+                result = state.render
+            elif self.path == "/replay/playback":
+                if data is not None:
+                    state.update_playback(data)
+                result = state.playback()
+            elif self.path == "/replay/sequence":
+                if data is not None:
+                    state.sequence = data
+                result = state.sequence
+            else:
+                self.reply(404, {"error": "Unknown endpoint"})
+                return
+            body = json.dumps(result)
+        self.reply(200, body)
+
+    def reply(self, code, body):
+        if not isinstance(body, str):
+            body = json.dumps(body)
+        body = body.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ReplayServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=2999, latency=0.0, jitter=0.0, error_rate=0.0, cert=None, key=None,
+                 record=None, seek_time=0.0):
+        HTTPServer.__init__(self, (host, port), ReplayHandler)
+        # latency, jitter and seek_time are given in seconds
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.state = ReplayState(seek_time=seek_time)
+        self.requests = {}
+        self.count_lock = threading.Lock()
+        self.thread = None
+        self.recorder = None if record is None else SessionLog.Recorder(record)
+
+        if cert is None:
+            cert, key = CERT, KEY
+        context = ssl.SSLContext(getattr(ssl, "PROTOCOL_TLS_SERVER", ssl.PROTOCOL_SSLv23))
+        context.load_cert_chain(cert, key)
+        self.socket = context.wrap_socket(self.socket, server_side=True)
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def count(self, path):
+        with self.count_lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def start(self):
+        # serve from a background thread so it can run next to maya's event loop
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self.thread is not None:
+            self.thread.join()
+        if self.recorder is not None:
+            self.recorder.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the league replay api")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2999)
+    parser.add_argument("--latency", type=float, default=0.0, help="artificial latency in milliseconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random +- jitter in milliseconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail with a 500")
+    parser.add_argument("--cert", help="certificate file, the test certificate in assets/certs if omitted")
+    parser.add_argument("--key", help="private key file for --cert")
+    parser.add_argument("--record", help="append every request body to this session log")
+    parser.add_argument("--seek-time", type=float, default=0.0, help="milliseconds a seek takes")
+    args = parser.parse_args()
+
+    server = ReplayServer(args.host, args.port, args.latency / 1000.0, args.jitter / 1000.0, args.error_rate,
+                          args.cert, args.key, args.record, args.seek_time / 1000.0)
+    print("Serving replay api on https://{}:{}".format(args.host, server.port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if server.recorder is not None:
+            server.recorder.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+from maya.api import OpenMaya, OpenMayaAnim
+from maya import cmds
+from UndoStack import UndoStack
+import CameraMath
+import Cuts
+import LeagueDoF
+import SequenceFile
+import Simplify
+import numpy as np
+import json
+import math
+import time
+
+# necessary variable to tell maya to use OpenMaya Api 2.0
+maya_useNewAPI = True
+
+
+class Bake(object):
+    def __init__(self, camera):
+        sel_list = OpenMaya.MSelectionList()
+        sel_list.add(camera)
+        self.obj = sel_list.getDependNode(0)
+        dag = OpenMaya.MFnDagNode(sel_list.getDagPath(0))
+        self.order = dag.findPlug("rotateOrder", False).asShort()
+        self.transform = [dag.findPlug(name, False) for name in ("translateX", "translateY", "translateZ",
+                                                                 "rotateX", "rotateY", "rotateZ")]
+        # dof and fov come straight from the dof node's output
+        try:
+            dof = OpenMaya.MFnDependencyNode(LeagueDoF.find_dof(self.obj))
+        except RuntimeError:
+            self.dof = []
+            self.fov = []
+            dof_inputs = []
+        else:
+            self.dof = [dof.findPlug(name, False) for name in ("dofNear", "dofFocal", "dofFar")]
+            self.fov = [dof.findPlug("dofFov", False)]
+            dof_inputs = [dag.findPlug(name, False) for name in ("focalPoint", "width", "nearOffset", "farOffset",
+                                                                  "fov")]
+        self.plugs = self.transform + self.dof + self.fov
+        # the camera's own plugs behind those values, the ones that get keyed and edited
+        self.inputs = self.transform + dof_inputs
+        self.objs = [self.obj]
+
+    def evaluate(self, start, end):
+        """evaluate every plug for the whole frame range through time contexts instead of setting the current time,
+        which would force maya to evaluate the whole scene for every single frame"""
+        unit = OpenMaya.MTime.uiUnit()
+        frames = np.arange(start, end + 1, dtype=np.float64)
+        plugs = self.plugs
+        values = np.empty((len(frames), len(plugs)))
+        for i, frame in enumerate(frames):
+            context = OpenMaya.MDGContext(OpenMaya.MTime(frame, unit))
+            values[i] = [plug.asDouble(context) for plug in plugs]
+        seconds = frames * OpenMaya.MTime(1, unit).asUnits(OpenMaya.MTime.kSeconds)
+        return seconds, values
+
+    def tracks(self, start, end, tolerance=None):
+        return self.to_tracks(*self.evaluate(start, end), tolerance=tolerance)
+
+    def render(self, start, end):
+        """seconds, (N, 10) render payloads in RENDER_COLUMNS order and a mask of the rows whose dof and fov columns
+        hold actual values"""
+        seconds, values = self.evaluate(start, end)
+        dof = values[:, 6:10] if self.dof else None
+        has_dof = np.full(len(values), bool(self.dof))
+        return seconds, CameraMath.render_batch(values[:, :6], dof, self.order), has_dof
+
+    def to_tracks(self, seconds, values, tolerance=None):
+        """turn evaluated plug values into league director tracks, with a tolerance every track only keeps the keys
+        it needs to stay within tolerance of the bake"""
+        position, rotation = CameraMath.to_league(values[:, :6], self.order)
+        rotation = CameraMath.unwrap(rotation)
+        tracks = {
+            "cameraPosition": vector_track(seconds, position, tolerance=tolerance),
+            "cameraRotation": vector_track(seconds, rotation, tolerance=tolerance)
+        }
+        if self.dof:
+            dof = values[:, 6:9] * CameraMath.DOF_SCALE
+            for i, name in enumerate(("depthOfFieldNear", "depthOfFieldMid", "depthOfFieldFar")):
+                tracks[name] = float_track(seconds, dof[:, i], tolerance=tolerance)
+        if self.fov:
+            tracks["fieldOfView"] = float_track(seconds, values[:, -1], tolerance=tolerance)
+        return tracks
+
+
+class CutBake(object):
+    """bakes a whole edit, every frame comes from whichever camera the cut list has active at that time and frames
+    between cuts come from the default camera. Every camera gets resolved once up front. Evaluated rows are already
+    converted to RENDER_COLUMNS since the cameras can differ in rotate order and dof, followed by a column that tells
+    which dof rows are real and one with the cut each row came from"""
+    def __init__(self, cuts, camera):
+        self.cuts = cuts
+        self.bakes = dict((name, Bake(name)) for name in cuts.unique_cameras() + [camera])
+        self.default = self.bakes[camera]
+        bakes = list(self.bakes.values())
+        self.objs = [bake.obj for bake in bakes]
+        self.plugs = [plug for bake in bakes for plug in bake.plugs]
+        self.inputs = [plug for bake in bakes for plug in bake.inputs]
+
+    def evaluate(self, start, end):
+        columns = len(CameraMath.RENDER_COLUMNS)
+        frames = np.arange(start, end + 1, dtype=np.float64)
+        values = np.zeros((len(frames), columns + 2))
+        seconds = frames * OpenMaya.MTime(1, OpenMaya.MTime.uiUnit()).asUnits(OpenMaya.MTime.kSeconds)
+        for segment_start, segment_end, index in self.cuts.segments(start, end + 1):
+            # whole frames that fall into the segment
+            first = int(math.ceil(segment_start - start))
+            last = int(math.ceil(segment_end - start))
+            if first >= last:
+                continue
+            bake = self.default if index is None else self.bakes[self.cuts.cameras[index]]
+            rows = bake.evaluate(start + first, start + last - 1)[1]
+            dof = rows[:, 6:10] if bake.dof else None
+            values[first:last, :columns] = CameraMath.render_batch(rows[:, :6], dof, bake.order)
+            values[first:last, columns] = bool(bake.dof)
+            values[first:last, columns + 1] = -1 if index is None else index
+        return seconds, values
+
+    def tracks(self, start, end, tolerance=None):
+        return self.to_tracks(*self.evaluate(start, end), tolerance=tolerance)
+
+    def render(self, start, end):
+        # the same as Bake.render
+        seconds, values = self.evaluate(start, end)
+        columns = len(CameraMath.RENDER_COLUMNS)
+        return seconds, values[:, :columns], values[:, columns] > 0
+
+    def to_tracks(self, seconds, values, tolerance=None):
+        columns = len(CameraMath.RENDER_COLUMNS)
+        # the first key of every cut snaps there instead of blending over from the previous camera
+        cut = np.zeros(len(values), dtype=bool)
+        cut[1:] = values[1:, columns + 1] != values[:-1, columns + 1]
+        blend = np.where(cut, "snap", "linear").tolist()
+        # the rotation blends linearly within a cut, across a cut it snaps anyway
+        rotation = CameraMath.unwrap(values[:, 3:6], np.flatnonzero(cut))
+        tracks = {
+            "cameraPosition": vector_track(seconds, values[:, 0:3], blend, tolerance),
+            "cameraRotation": vector_track(seconds, rotation, blend, tolerance)
+        }
+        # cameras without a dof node leave the dof alone
+        has_dof = values[:, columns] > 0
+        if has_dof.any():
+            dof_blend = np.asarray(blend)[has_dof].tolist()
+            for i, name in enumerate(CameraMath.RENDER_COLUMNS[6:], 6):
+                tracks[name] = float_track(seconds[has_dof], values[has_dof, i], dof_blend, tolerance)
+        return tracks
+
+
+def shot_cuts():
+    """cut list from the shots in the camera sequencer. Shot ranges include their end frame, so the cut ends one
+    frame later"""
+    cuts = Cuts.CutList()
+    shots = OpenMaya.MItDependencyNodes(OpenMaya.MFn.kShot)
+    while not shots.isDone():
+        shot = OpenMaya.MFnDependencyNode(shots.thisNode())
+        source = shot.findPlug("currentCamera", False).source()
+        if not source.isNull:
+            camera = source.node()
+            # the shot can point at either the camera's shape or its transform
+            if camera.hasFn(OpenMaya.MFn.kCamera):
+                camera = OpenMaya.MFnDagNode(camera).parent(0)
+            cuts.add(shot.findPlug("startFrame", False).asDouble(), shot.findPlug("endFrame", False).asDouble() + 1,
+                     OpenMaya.MFnDagNode(camera).partialPathName())
+        shots.next()
+    return cuts
+
+
+def bake(camera, cuts=None):
+    # the cut list's cameras if there are any cuts, just the camera otherwise
+    if cuts:
+        return CutBake(cuts, camera)
+    return Bake(camera)
+
+
+def reduce_keys(seconds, values, blends, tolerance):
+    # keys that snap and the ones right before them mark cuts, so those always stay
+    snap = np.array([blend != "linear" for blend in blends], dtype=bool)
+    keep = snap.copy()
+    keep[:-1] |= snap[1:]
+    mask = Simplify.simplify(seconds, values, tolerance, keep)
+    return seconds[mask], values[mask], [blend for blend, kept in zip(blends, mask) if kept]
+
+
+def vector_track(seconds, values, blend="linear", tolerance=None):
+    # blend is either one blend for every key or a list with one per key
+    blends = blend if isinstance(blend, list) else [blend] * len(values)
+    if tolerance is not None:
+        seconds, values, blends = reduce_keys(seconds, values, blends, tolerance)
+    return [{"time": t, "value": {"x": x, "y": y, "z": z}, "blend": b}
+            for t, (x, y, z), b in zip(seconds.tolist(), values.tolist(), blends)]
+
+
+def float_track(seconds, values, blend="linear", tolerance=None):
+    blends = blend if isinstance(blend, list) else [blend] * len(values)
+    if tolerance is not None:
+        seconds, values, blends = reduce_keys(seconds, values, blends, tolerance)
+    return [{"time": t, "value": v, "blend": b} for t, v, b in zip(seconds.tolist(), values.tolist(), blends)]
+
+
+def compression(frames, tracks):
+    # compression ratio of reduced tracks compared to a key on every frame of every track
+    return Simplify.ratio(frames * len(tracks), sum(len(track) for track in tracks.values()))
+
+
+def export(path, camera, start=None, end=None, cuts=None, tolerance=None):
+    """returns the number of baked frames, how long it took and the compression ratio of the keys, which is 1 without
+    a tolerance"""
+    # default to the playback range
+    if start is None:
+        start = OpenMayaAnim.MAnimControl.minTime().value
+    if end is None:
+        end = OpenMayaAnim.MAnimControl.maxTime().value
+    start_time = time.time()
+    frames = int(end - start) + 1
+    tracks = bake(camera, cuts).tracks(start, end, tolerance)
+    with open(path, "w") as f:
+        json.dump(tracks, f)
+    return frames, time.time() - start_time, compression(frames, tracks)
+
+
+class Writer(object):
+
+    def __init__(self, camera):
+        sel_list = OpenMaya.MSelectionList()
+        sel_list.add(camera)
+        self.dag = OpenMaya.MFnDagNode(sel_list.getDagPath(0))
+        # connections need a path that is unique, the curves are named after the camera without its namespace
+        self.path = self.dag.partialPathName()
+        self.name = self.dag.name().rpartition(":")[2]
+        self.order = self.dag.findPlug("rotateOrder", False).asShort()
+
+    def write(self, tracks):
+        """convert all tracks in one go and write every channel with a single addKeys call. The curves are created
+        through commands so the whole import can be undone in one step"""
+        count = 0
+        order = self.order
+        if "cameraPosition" in tracks:
+            seconds, position = tracks["cameraPosition"]
+            transforms = CameraMath.from_league(position, np.empty((0, 3)), order)
+            for i, attr in enumerate(("translateX", "translateY", "translateZ")):
+                count += self.add_keys(attr, "animCurveTL", seconds, transforms[:, i])
+        if "cameraRotation" in tracks:
+            seconds, rotation = tracks["cameraRotation"]
+            transforms = CameraMath.from_league(np.empty((0, 3)), rotation, order)
+            # every key got decomposed on its own, linear tangents between them must not spin around a full turn
+            transforms[:, 3:] = np.radians(CameraMath.unwrap(np.degrees(transforms[:, 3:])))
+            for i, attr in enumerate(("rotateX", "rotateY", "rotateZ")):
+                count += self.add_keys(attr, "animCurveTA", seconds, transforms[:, i + 3])
+        count += self.write_dof(tracks)
+        if "fieldOfView" in tracks:
+            count += self.add_keys("fov", "animCurveTU", *tracks["fieldOfView"])
+        return count
+
+    def write_dof(self, tracks):
+        # the camera only stores focal point, width and offsets, so turn near, mid and far back into those
+        names = ("depthOfFieldNear", "depthOfFieldMid", "depthOfFieldFar")
+        if not all(name in tracks for name in names):
+            return 0
+        seconds = tracks["depthOfFieldMid"][0]
+        # league uses different units for the dof
+        near, mid, far = [tracks[name][1] / CameraMath.DOF_SCALE for name in names]
+        if not all(np.array_equal(tracks[name][0], seconds) for name in names):
+            # the tracks weren't keyed together, so there's nothing to solve for, keep just the focal point
+            return self.add_keys("focalPoint", "animCurveTU", seconds, mid)
+        count = 0
+        fp, width, offset = CameraMath.dof_inputs(near, mid, far)
+        for attr, values in (("focalPoint", fp), ("width", width), ("nearOffset", offset), ("farOffset", offset)):
+            count += self.add_keys(attr, "animCurveTU", seconds, values)
+        return count
+
+    def add_keys(self, attr, curve_type, seconds, values):
+        try:
+            self.dag.findPlug(attr, False)
+        except RuntimeError:
+            return 0
+        # replace whatever curve is connected right now, undoing restores the old connection
+        curve = cmds.createNode(curve_type, name="{}_{}".format(self.name, attr))
+        cmds.connectAttr(curve + ".output", "{}.{}".format(self.path, attr), force=True)
+        sel_list = OpenMaya.MSelectionList()
+        sel_list.add(curve)
+        fn = OpenMayaAnim.MFnAnimCurve(sel_list.getDependNode(0))
+
+        unit = OpenMaya.MTime.uiUnit()
+        frames = seconds / OpenMaya.MTime(1, unit).asUnits(OpenMaya.MTime.kSeconds)
+        times = OpenMaya.MTimeArray([OpenMaya.MTime(frame, unit) for frame in frames.tolist()])
+        fn.addKeys(times, OpenMaya.MDoubleArray(values.tolist()), OpenMayaAnim.MFnAnimCurve.kTangentLinear,
+                   OpenMayaAnim.MFnAnimCurve.kTangentLinear)
+        return len(times)
+
+
+class Take(object):
+    """camera samples of the replay captured by MTLR.Capture. Every sample goes into preallocated arrays that double
+    in size when they run full, so adding one is a handful of stores no matter how long the take gets. Render samples
+    and the replay's time are polled separately, each sample is stamped with the clock half way between sending the
+    request and getting the answer"""
+    def __init__(self, capacity=18000):
+        self.renders = np.empty((capacity, 1 + len(CameraMath.RENDER_COLUMNS)))
+        self.times = np.empty((capacity, 2))
+        self.render_count = 0
+        self.time_count = 0
+
+    def __len__(self):
+        return self.render_count
+
+    @staticmethod
+    def grow(buffer, count):
+        if count < len(buffer):
+            return buffer
+        result = np.empty((len(buffer) * 2, buffer.shape[1]))
+        result[:count] = buffer
+        return result
+
+    def add_render(self, clock, data):
+        # fields the game didn't answer with become nan, their tracks get left out
+        self.renders = self.grow(self.renders, self.render_count)
+        row = self.renders[self.render_count]
+        row[0] = clock
+        for i, column in enumerate(CameraMath.RENDER_COLUMNS, 1):
+            name, _, axis = column.partition(".")
+            value = data.get(name)
+            if axis and value is not None:
+                value = value.get(axis)
+            row[i] = np.nan if value is None else value
+        self.render_count += 1
+
+    def add_time(self, clock, seconds):
+        self.times = self.grow(self.times, self.time_count)
+        self.times[self.time_count] = clock, seconds
+        self.time_count += 1
+
+    def tracks(self):
+        """the take as sequence tracks, the same dict of name -> (seconds, values) that read returns. Samples are put
+        on the replay's timeline by interpolating between the polled times, a paused replay keeps answering with the
+        same time, so only the last sample of every time is kept"""
+        renders = self.renders[:self.render_count]
+        times = self.times[:self.time_count]
+        if not len(renders) or not len(times):
+            return {}
+        times = times[np.argsort(times[:, 0], kind="stable")]
+        seconds = np.interp(renders[:, 0], times[:, 0], times[:, 1])
+        # unique keeps the first of every time, so look at the samples from the back
+        seconds, index = np.unique(seconds[::-1], return_index=True)
+        values = renders[::-1][index, 1:]
+
+        tracks = {}
+        for name, columns in (("cameraPosition", slice(0, 3)), ("cameraRotation", slice(3, 6))):
+            if not np.isnan(values[:, columns]).any():
+                tracks[name] = seconds, values[:, columns]
+        for i, name in enumerate(CameraMath.RENDER_COLUMNS[6:], 6):
+            if not np.isnan(values[:, i]).any():
+                tracks[name] = seconds, values[:, i]
+        return tracks
+
+
+def capture_keys(take, camera):
+    # writes a captured take as keys on the camera, returns the number of keys written and the keys per second
+    start_time = time.time()
+    with UndoStack("Capture Camera"):
+        count = Writer(camera).write(take.tracks())
+    return count, count / max(time.time() - start_time, 1e-6)
+
+
+def import_keys(path, camera):
+    # returns the number of keys written and the keys imported per second
+    start_time = time.time()
+    with UndoStack("Import Keyframes"):
+        count = Writer(camera).write(SequenceFile.read(path))
+    return count, count / max(time.time() - start_time, 1e-6)
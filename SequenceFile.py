@@ -0,0 +1,111 @@
+"""sequence files as the replay api's /replay/sequence endpoint takes them. Reading only needs json and numpy, so it
+works without maya, writing the keys onto a camera is up to Sequence"""
+from array import array
+import numpy as np
+import json
+
+
+class StreamReader(object):
+    """incremental parser for sequence files. Only the current chunk and a single keyframe are ever decoded at once,
+    so even hour long sequences never have to be loaded into memory as a whole"""
+    whitespace = " \t\n\r"
+    delimiters = whitespace + ",:]}"
+
+    def __init__(self, f, chunk_size=1 << 16):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def read(self):
+        # drop everything that has already been parsed before appending the next chunk
+        chunk = self.f.read(self.chunk_size)
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+        return not self.eof
+
+    def peek(self):
+        # return the next non whitespace character without consuming it
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in self.whitespace:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.read():
+                raise ValueError("Unexpected end of sequence file")
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError("Expected '{}' at position {}".format(char, self.pos))
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                # most likely the value continues in the next chunk
+                if not self.read():
+                    raise
+                continue
+            # numbers could be cut off at the end of a chunk, so only trust a value once a delimiter follows it
+            if (end == len(self.buffer) or self.buffer[end] not in self.delimiters) and self.read():
+                continue
+            self.pos = end
+            return value
+
+    def __iter__(self):
+        # yields (track, keyframe) for every keyframe in the file, anything that isn't a track gets skipped
+        self.expect("{")
+        if self.peek() == "}":
+            return
+        while True:
+            name = self.value()
+            self.expect(":")
+            if self.peek() == "[":
+                self.pos += 1
+                if self.peek() == "]":
+                    self.pos += 1
+                else:
+                    while True:
+                        yield name, self.value()
+                        if self.peek() == "]":
+                            self.pos += 1
+                            break
+                        self.expect(",")
+            else:
+                self.value()
+            if self.peek() == "}":
+                return
+            self.expect(",")
+
+
+def read(path):
+    """read a sequence file into compact arrays, returns a dict of track name -> (seconds, values) where values is
+    an (N, 3) array for vector tracks and an (N,) array for everything else"""
+    times = {}
+    values = {}
+    with open(path, "r") as f:
+        for name, key in StreamReader(f):
+            value = key["value"]
+            if name not in times:
+                times[name] = array("d")
+                values[name] = array("d")
+            times[name].append(key["time"])
+            if isinstance(value, dict):
+                values[name].extend((value["x"], value["y"], value["z"]))
+            else:
+                values[name].append(value)
+
+    tracks = {}
+    for name in times:
+        seconds = np.frombuffer(times[name], dtype=np.float64)
+        data = np.frombuffer(values[name], dtype=np.float64)
+        if len(data) != len(seconds):
+            data = data.reshape(-1, 3)
+        tracks[name] = seconds, data
+    return tracks
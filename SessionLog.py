@@ -0,0 +1,103 @@
+"""binary log of everything the live link sends, so a session can be played back against a game without maya. The
+file starts with a short header followed by one record per request: a fixed size head with the time it was sent, the
+endpoint and the length of the body, then the body itself exactly as it went out. Records are only ever appended and
+reading goes through mmap, so neither side has to hold more than a single record in memory."""
+import mmap
+import struct
+import threading
+
+MAGIC = b"MTLRLOG1"
+# time.time() of the request, index into ENDPOINTS and length of the body in bytes
+HEAD = struct.Struct("<dBI")
+# never reorder these, the index is what gets stored
+ENDPOINTS = ("render", "playback", "sequence")
+
+
+class Recorder(object):
+    """appends records to a buffer and only writes it out once it reaches flush_size bytes, so recording a frame is
+    little more than packing a few bytes. The sender thread writes while the ui thread might close the recorder, the
+    lock keeps the two from interleaving"""
+    def __init__(self, path, flush_size=1 << 16):
+        self.path = path
+        self.flush_size = flush_size
+        self.file = open(path, "ab")
+        if not self.file.tell():
+            self.file.write(MAGIC)
+        self.buffer = bytearray()
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def write(self, stamp, url, body):
+        if not isinstance(body, bytes):
+            body = body.encode("utf-8")
+        with self.lock:
+            if self.file is None:
+                return
+            self.buffer += HEAD.pack(stamp, ENDPOINTS.index(url), len(body))
+            self.buffer += body
+            self.count += 1
+            if len(self.buffer) >= self.flush_size:
+                self.flush()
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.file.flush()
+        del self.buffer[:]
+
+    def close(self):
+        with self.lock:
+            if self.file is None:
+                return
+            self.flush()
+            self.file.close()
+            self.file = None
+
+
+class Reader(object):
+    """iterates over the (time, endpoint, body) records of a log. The file is memory mapped and only the body of the
+    current record gets copied out, so even logs of hour long sessions can be read without loading them. A record
+    that was cut off, e.g. because maya crashed while recording, ends the log"""
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError("{} is not a session log".format(path))
+
+    def __iter__(self):
+        data = self.map
+        size = len(data)
+        offset = len(MAGIC)
+        while offset + HEAD.size <= size:
+            stamp, endpoint, length = HEAD.unpack_from(data, offset)
+            offset += HEAD.size
+            if offset + length > size:
+                return
+            yield stamp, ENDPOINTS[endpoint], data[offset:offset + length]
+            offset += length
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def compare(first, second):
+    """compare the endpoints and bodies of two logs, timing is ignored. Returns the number of matching records and
+    the index of the first mismatch, which is None if both logs are identical"""
+    with Reader(first) as a, Reader(second) as b:
+        records = iter(b)
+        count = 0
+        for _, url, body in a:
+            other = next(records, None)
+            if other is None or other[1] != url or other[2] != body:
+                return count, count
+            count += 1
+        if next(records, None) is not None:
+            return count, count
+        return count, None
@@ -0,0 +1,64 @@
+"""keyframe reduction for baked tracks. A bake has a key on every frame, but between two keys the game interpolates
+linearly anyway, so every key that sits within tolerance of the line between its neighbours can go. This is
+Ramer-Douglas-Peucker measured along the time axis: instead of recursing into one segment at a time, every pass
+splits all segments that are still too far off at once, so each pass is a handful of numpy operations over the whole
+track. A segment gets split at the worst key of every stretch that is out of tolerance, not just at its single
+worst key, so a long periodic track takes a logarithmic number of passes instead of one pass per swing."""
+import numpy as np
+
+
+def simplify(seconds, values, tolerance, keep=None):
+    """mask of the keys to keep so that linear interpolation between them never differs from any of the original keys
+    by more than tolerance. values can have one column per component, the error of a key is the length of its error
+    vector. The first and the last key are always kept, as are the ones set in the optional keep mask"""
+    seconds = np.asarray(seconds, dtype=np.float64)
+    count = len(seconds)
+    if count < 3:
+        return np.ones(count, dtype=bool)
+    values = np.asarray(values, dtype=np.float64).reshape(count, -1)
+    mask = np.zeros(count, dtype=bool)
+    if keep is not None:
+        mask |= np.asarray(keep, dtype=bool)
+    mask[0] = mask[-1] = True
+
+    # one row per component makes gathering the values of the segment ends a lot cheaper
+    components = np.ascontiguousarray(values.T)
+    limit = tolerance * tolerance
+    # keys that still sit in a segment that might have to be split, everything else is settled
+    candidates = np.flatnonzero(~mask)
+    while len(candidates):
+        kept = np.flatnonzero(mask)
+        # every candidate belongs to the segment between the kept keys around it
+        segment = np.searchsorted(kept, candidates)
+        start = kept[segment - 1]
+        end = kept[segment]
+        fraction = (seconds[candidates] - seconds[start]) / (seconds[end] - seconds[start])
+        error = np.zeros(len(candidates))
+        for component in components:
+            a = component[start]
+            error += np.square(component[candidates] - a - fraction * (component[end] - a))
+
+        over = np.flatnonzero(error > limit)
+        if not len(over):
+            break
+        # runs of neighbouring keys that are too far off, a key within tolerance or a kept key ends a run. Every run
+        # gets split at its worst key, so a segment that swings across the line many times is split at every swing
+        # in the same pass instead of one swing per pass
+        keys = candidates[over]
+        first = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1] + 1])
+        run = np.cumsum(np.r_[True, keys[1:] != keys[:-1] + 1]) - 1
+        peak = np.maximum.reduceat(error[over], first)
+        worst = np.flatnonzero(error[over] == peak[run])
+        # one key per run is enough, the next pass takes care of the rest
+        worst = worst[np.r_[True, run[worst[1:]] != run[worst[:-1]]]]
+        mask[keys[worst]] = True
+        # only the segments that were split can still be off, their keys are the next pass's candidates
+        split = np.zeros(len(kept) + 1, dtype=bool)
+        split[segment[over]] = True
+        candidates = candidates[split[segment] & ~mask[candidates]]
+    return mask
+
+
+def ratio(before, after):
+    # compression ratio, how many keys there were for every key that's left
+    return before / float(after) if after else 1.0
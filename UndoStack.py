@@ -1,4 +1,4 @@
-import pymel.core as pm
+from maya import cmds
 
 
 class UndoStack(object):
@@ -7,7 +7,7 @@ class UndoStack(object):
         self.name = name
 
     def __enter__(self):
-        pm.undoInfo(openChunk=True, infinity=True, cn=self.name)
+        cmds.undoInfo(openChunk=True, infinity=True, chunkName=self.name)
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        pm.undoInfo(closeChunk=True)
+        cmds.undoInfo(closeChunk=True)
@@ -0,0 +1,41 @@
+"""camera creation benchmark for the batched leagueCam command. Creates N cameras in one call for every count, then
+undoes and redoes the batch and reports the time per camera, which should stay flat as N grows. Has to be run with
+mayapy:
+
+    mayapy benchmarks/cameras.py --counts 1 10 100 500
+"""
+import argparse
+import time
+
+import common
+from maya import cmds
+
+
+def timed(function, *args, **kwargs):
+    start = time.time()
+    result = function(*args, **kwargs)
+    return time.time() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="leagueCam creation benchmark")
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 10, 100, 500])
+    args = parser.parse_args()
+
+    common.load_plugin()
+    cmds.undoInfo(state=True, infinity=True)
+    print("{:>6} {:>12} {:>12} {:>12} {:>12}".format("count", "create ms", "ms/camera", "undo ms", "redo ms"))
+    for count in args.counts:
+        cmds.file(new=True, force=True)
+        create, names = timed(cmds.leagueCam, count=count)
+        assert len(names) == count and len(cmds.ls(type="leagueDoF")) == count
+        undo = timed(cmds.undo)[0]
+        assert not cmds.ls(type="leagueDoF")
+        redo = timed(cmds.redo)[0]
+        assert len(cmds.ls(type="leagueDoF")) == count
+        print("{:>6} {:>12.1f} {:>12.3f} {:>12.1f} {:>12.1f}".format(count, create * 1000, create * 1000 / count,
+                                                                     undo * 1000, redo * 1000))
+
+
+if __name__ == "__main__":
+    main()
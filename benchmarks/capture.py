@@ -0,0 +1,77 @@
+"""capture benchmark for the reverse link. The stand-in server's camera gets moved along a known path while the replay
+plays, Capture records it at the given rate, and the take gets written as keys on a leagueCam. Reports the samples
+per second that made it into the take, how long writing the keys took and how far the keys are from the path. Has to
+be run with mayapy:
+
+    mayapy benchmarks/capture.py --rate 60 --duration 10 --latency 5
+"""
+import argparse
+import threading
+import time
+
+import common
+from maya import cmds
+from maya.api import OpenMaya
+
+import MTLR
+
+# league units per second the camera moves along x
+SPEED = 100.0
+
+
+def move_camera(server, stop):
+    # the free camera of the game, flying along x with the replay's clock
+    while not stop.is_set():
+        state = server.state
+        with state.lock:
+            state.render["cameraPosition"]["x"] = state.current_time() * SPEED
+        time.sleep(0.001)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reverse link capture benchmark")
+    parser.add_argument("--rate", type=int, default=60)
+    parser.add_argument("--depth", type=int, default=2, help="requests of each kind on their way at once")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--latency", type=float, default=0.0, help="server latency in milliseconds")
+    args = parser.parse_args()
+
+    app = common.application()
+    server = common.start_server(args.latency)
+    server.state.update_playback({"paused": False, "speed": 1.0, "time": 0.0})
+    stop = threading.Event()
+    mover = threading.Thread(target=move_camera, args=(server, stop))
+    mover.daemon = True
+    mover.start()
+
+    camera = common.create_camera()
+    capture = MTLR.Capture(camera, args.rate, args.depth)
+    capture.start()
+    common.wait(args.duration)
+
+    start = time.time()
+    samples, keys, _ = capture.finish()
+    written = time.time() - start
+    stop.set()
+
+    # the game's x is maya's -x, so every key should sit on -SPEED * seconds
+    times = cmds.keyframe(camera + ".translateX", query=True, timeChange=True) or []
+    values = cmds.keyframe(camera + ".translateX", query=True, valueChange=True) or []
+    frame = OpenMaya.MTime(1, OpenMaya.MTime.uiUnit()).asUnits(OpenMaya.MTime.kSeconds)
+    error = max(abs(value + key * frame * SPEED) for key, value in zip(times, values)) if times else None
+
+    print("{} samples in {:.1f}s ({:.1f}/s at {}/s), {} errors".format(samples, args.duration,
+                                                                        samples / args.duration, args.rate,
+                                                                        capture.errors))
+    print("{} keys written in {:.1f} ms".format(keys, written * 1000))
+    if error is not None:
+        print("max translateX error against the path: {:.3f} ({:.1f} units per sample)".format(
+            error, SPEED / args.rate))
+
+    MTLR.Sender.shutdown()
+    server.stop()
+    del app
+
+
+if __name__ == "__main__":
+    main()
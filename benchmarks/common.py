@@ -0,0 +1,52 @@
+"""setup the mayapy benchmarks share. Importing this initializes maya standalone and puts the package on the path, so
+it has to come before any maya or package import of the benchmark"""
+import os
+import sys
+
+import maya.standalone
+maya.standalone.initialize()
+
+from maya import cmds
+from PySide2 import QtCore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import ReplayApiData
+import ReplayServer
+
+
+class CameraName(str):
+    # set_pos expects the line edit from the ui, this gives a plain string the same interface
+    def text(self):
+        return str(self)
+
+
+def application():
+    # the sender and every reply need a qt event loop, mayapy doesn't start one on its own
+    return QtCore.QCoreApplication.instance() or QtCore.QCoreApplication(sys.argv)
+
+
+def start_server(latency=0.0, jitter=0.0, connect=True, **kwargs):
+    """stand-in server on a free port, latency and jitter are given in milliseconds. Unless connect is False the link
+    sends to it right away, the rest of the keyword arguments go to ReplayServer"""
+    server = ReplayServer.ReplayServer(port=0, latency=latency / 1000.0, jitter=jitter / 1000.0, **kwargs).start()
+    if connect:
+        ReplayApiData.set_host("127.0.0.1", server.port)
+    return server
+
+
+def load_plugin():
+    cmds.loadPlugin(os.path.join(ROOT, "plug-ins", "createCamera.py"), quiet=True)
+
+
+def create_camera():
+    # a single leagueCam, which is also left selected
+    load_plugin()
+    return CameraName(cmds.leagueCam()[0])
+
+
+def wait(seconds):
+    # keep the event loop running for a while, replies and timers only get handled in here
+    loop = QtCore.QEventLoop()
+    QtCore.QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec_()
@@ -0,0 +1,67 @@
+"""micro-benchmark of the FrameEncoder against the old path of filling the shared ReplayApiData dictionaries and
+running json.dumps over them. Doesn't need maya, any python works:
+
+    python benchmarks/encoder.py --number 200000
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import FrameEncoder
+import ReplayApiData
+
+CAMERA = (-1520.25, 380.5, 2210.125, -213.75, -12.5, 0.25)
+DOF = (150.0, 2000.0, 4000.0, 40.0)
+
+
+def json_camera(render=copy.deepcopy(ReplayApiData.render)):
+    # what get_pos and post used to do for every tick
+    render["cameraPosition"]["x"] = CAMERA[0]
+    render["cameraPosition"]["y"] = CAMERA[1]
+    render["cameraPosition"]["z"] = CAMERA[2]
+    render["cameraRotation"]["x"] = CAMERA[3]
+    render["cameraRotation"]["y"] = CAMERA[4]
+    render["cameraRotation"]["z"] = CAMERA[5]
+    return json.dumps(render)
+
+
+def json_dof():
+    # what DoF.convert_dict used to do for every change
+    return json.dumps({
+        "depthOfFieldFar": DOF[2],
+        "depthOfFieldMid": DOF[1],
+        "depthOfFieldNear": DOF[0],
+        "fieldOfView": DOF[3]
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame encoder micro-benchmark")
+    parser.add_argument("--number", type=int, default=200000, help="encodes per measurement")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    encoder = FrameEncoder.FrameEncoder()
+    camera_shape = ("camera",)
+    dof_shape = ("dof", "fov")
+    cases = [
+        ("camera json.dumps", json_camera),
+        ("camera FrameEncoder", lambda: encoder.encode(camera_shape, CAMERA)),
+        ("dof json.dumps", json_dof),
+        ("dof FrameEncoder", lambda: encoder.encode(dof_shape, DOF)),
+        ("playback json.dumps", lambda: json.dumps(ReplayApiData.playback)),
+        ("playback FrameEncoder", lambda: encoder.encode(("playback",), (FrameEncoder.TRUE, 1.0, 12.5)))
+    ]
+    print("{:<24} {:>12}".format("case", "ns/encode"))
+    for name, function in cases:
+        best = min(timeit.repeat(function, number=args.number, repeat=args.repeat))
+        print("{:<24} {:>12.1f}".format(name, best / args.number * 1e9))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""fan-out benchmark for sending the live link to several replay clients at once. Starts one stand-in server per
+latency, optionally adds a client that nothing listens on, and drives MayaToLeagueReplay.set_pos at a fixed tick rate.
+Every client should get close to the tick rate or whatever its own latency allows, no matter how slow the others are,
+and frames that several clients share only get encoded once. Has to be run with mayapy:
+
+    mayapy benchmarks/fanout.py --latencies 0 5 50 --dead --rate 60 --duration 10
+"""
+import argparse
+import socket
+import time
+
+import common
+from maya import cmds
+from PySide2 import QtCore
+
+import MTLR
+import ReplayApiData
+
+
+def free_port():
+    # a port nothing listens on, for a client whose game isn't running
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live link fan-out benchmark")
+    parser.add_argument("--latencies", type=float, nargs="+", default=[0, 5, 50],
+                        help="one stand-in server per latency in milliseconds")
+    parser.add_argument("--dead", action="store_true", help="add a client that nothing listens on")
+    parser.add_argument("--rate", type=int, default=60)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    app = common.application()
+    servers = [common.start_server(latency, connect=False) for latency in args.latencies]
+    hosts = [("127.0.0.1", server.port) for server in servers]
+    if args.dead:
+        hosts.append(("127.0.0.1", free_port()))
+    ReplayApiData.set_clients(hosts)
+
+    camera = common.create_camera()
+    commands = MTLR.MayaToLeagueReplay()
+    sender = commands.sender
+    # give the first probes time to come back, until then nothing goes out
+    common.wait(1.0)
+    sender.metrics.reset()
+    state = {"tick": 0}
+    commands.frame.follow_ticks(True)
+
+    def tick():
+        # move the camera every tick so nothing gets skipped by the dirty check
+        cmds.setAttr(camera + ".translateX", state["tick"] % 1000)
+        state["tick"] += 1
+        commands.set_pos(camera)
+
+    timer = QtCore.QTimer()
+    timer.setTimerType(QtCore.Qt.PreciseTimer)
+    timer.timeout.connect(tick)
+    timer.start(int(1000.0 / args.rate))
+    start = time.time()
+    common.wait(args.duration)
+    timer.stop()
+    commands.frame.follow_ticks(False)
+    elapsed = time.time() - start
+    # the live clients finish their last requests, the dead one would only wait for its next probe
+    common.wait(0.5)
+
+    print("{} ticks at {:.1f}/s".format(state["tick"], state["tick"] / elapsed))
+    print("{:>22} {:>24} {:>8} {:>8} {:>10} {:>11}".format("client", "state", "sent/s", "merged", "latency ms",
+                                                            "received/s"))
+    for client, stats in zip(sender.worker.clients, sender.client_stats()):
+        server = next((server for server in servers if server.port == int(stats["name"].split(":")[1])), None)
+        received = None if server is None else server.requests.get("/replay/render", 0) / elapsed
+        print("{:>22} {:>24} {:>8.1f} {:>8} {:>10} {:>11}".format(
+            stats["name"], stats["state"], client.sent["render"] / elapsed, stats["merged"],
+            "-" if stats["latency"] is None else "{:.2f}".format(stats["latency"] * 1000),
+            "-" if received is None else "{:.1f}".format(received)))
+    counters = sender.metrics.counters
+    print("requests sent: {}, bodies encoded: {}".format(counters["sent"], sender.metrics.stages["encode"].count))
+
+    commands.cleanup()
+    MTLR.Sender.shutdown()
+    for server in servers:
+        server.stop()
+    del app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""end-to-end latency benchmark for the live link. Drives MayaToLeagueReplay.set_pos, DoF.convert_dict and the time
+link against the local stand-in server at different tick rates and reports the achieved send rate, request latency,
+dropped frames and memory growth. Has to be run with mayapy:
+
+    mayapy benchmarks/link.py --rates 1 30 60 120 200 --duration 10 --latency 5 --jitter 2
+"""
+import argparse
+import json
+import time
+
+import common
+from maya import cmds
+from maya.api import OpenMaya
+from PySide2 import QtCore
+
+import MTLR
+
+
+def memory():
+    # resident memory in kilobytes, if there is a way to get it on this platform
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1024.0
+    except ImportError:
+        pass
+    try:
+        import resource
+        return float(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+    except ImportError:
+        return None
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def run(rate, duration, camera, dof, commands):
+    sender = commands.sender
+    latencies = []
+    sender.on_reply = lambda url, latency, reply: latencies.append(latency)
+    sent, dropped = sender.sent_count, sender.dropped_count
+    state = {"tick": 0}
+    start_memory = memory()
+    # the same as the live link, every tick flushes one render frame
+    commands.frame.follow_ticks(True)
+
+    def tick():
+        # move the camera and the dof every tick so nothing gets skipped by the dirty check
+        i = state["tick"]
+        state["tick"] += 1
+        cmds.setAttr(camera + ".translateX", i % 1000)
+        dof.convert_dict({"near": i % 100, "fp": 200, "far": 400, "fov": 40})
+        commands.set_pos(camera)
+        # the time link only posts every now and then
+        if i % max(rate, 1) == 0:
+            commands.playback["time"] = i / float(rate)
+            commands.post("playback")
+
+    timer = QtCore.QTimer()
+    timer.setTimerType(QtCore.Qt.PreciseTimer)
+    timer.timeout.connect(tick)
+    timer.start(int(1000.0 / rate))
+    start = time.time()
+    common.wait(duration)
+    timer.stop()
+    commands.frame.follow_ticks(False)
+    elapsed = time.time() - start
+
+    # let the last replies come in before reading the counters
+    while sender.busy():
+        QtCore.QCoreApplication.processEvents()
+    end_memory = memory()
+    sender.on_reply = None
+    return {
+        "tick_rate": rate,
+        "ticks": state["tick"],
+        "send_rate": (sender.sent_count - sent) / elapsed,
+        "p50_ms": (percentile(latencies, 0.5) or 0) * 1000,
+        "p99_ms": (percentile(latencies, 0.99) or 0) * 1000,
+        "dropped": sender.dropped_count - dropped,
+        "memory_kb": None if start_memory is None else end_memory - start_memory
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live link latency benchmark")
+    parser.add_argument("--rates", type=int, nargs="+", default=[1, 30, 60, 120, 200])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per tick rate")
+    parser.add_argument("--latency", type=float, default=0.0, help="server latency in milliseconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="server jitter in milliseconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    app = common.application()
+    server = common.start_server(args.latency, args.jitter, error_rate=args.error_rate)
+    camera = common.create_camera()
+    commands = MTLR.MayaToLeagueReplay()
+    dof = MTLR.DoF(OpenMaya.MGlobal.getActiveSelectionList().getDependNode(0))
+
+    results = []
+    print("{:>6} {:>8} {:>10} {:>9} {:>9} {:>8} {:>10}".format("rate", "ticks", "sent/s", "p50 ms", "p99 ms",
+                                                                "dropped", "mem kb"))
+    for rate in args.rates:
+        result = run(rate, args.duration, camera, dof, commands)
+        results.append(result)
+        print("{tick_rate:>6} {ticks:>8} {send_rate:>10.1f} {p50_ms:>9.2f} {p99_ms:>9.2f} {dropped:>8} "
+              "{memory:>10}".format(memory=str(result["memory_kb"]), **result))
+
+    dof.cleanup()
+    commands.cleanup()
+    server.stop()
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"server": vars(args), "results": results}, f, indent=4)
+    del app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""frame-stepped render benchmark. Runs MTLR.FrameStepper over an animated leagueCam against the local stand-in
+server and reports how many frames per second the lockstep pipeline manages at a given server latency. Also checks
+that the server saw every frame and ended up on the last one. Has to be run with mayapy:
+
+    mayapy benchmarks/render.py --frames 240 --latency 5 --jitter 2 --seek-time 20
+"""
+import argparse
+
+import common
+from maya import cmds
+from PySide2 import QtCore
+
+import MTLR
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame-stepped render benchmark")
+    parser.add_argument("--frames", type=int, default=240)
+    parser.add_argument("--latency", type=float, default=0.0, help="server latency in milliseconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="server jitter in milliseconds")
+    parser.add_argument("--seek-time", type=float, default=0.0, help="milliseconds the server takes for a seek")
+    parser.add_argument("--settle", type=int, default=0, help="milliseconds to wait after every frame")
+    args = parser.parse_args()
+
+    app = common.application()
+    server = common.start_server(args.latency, args.jitter, seek_time=args.seek_time / 1000.0)
+    camera = common.create_camera()
+    cmds.setKeyframe(camera, attribute="translateX", time=1, value=0)
+    cmds.setKeyframe(camera, attribute="translateX", time=args.frames, value=args.frames)
+
+    stepper = MTLR.FrameStepper(camera, start=1, end=args.frames, settle=args.settle)
+    loop = QtCore.QEventLoop()
+    results = []
+    stepper.on_finished = lambda result: (results.append(result), loop.quit())
+    stepper.start()
+    loop.exec_()
+    result = results[0]
+
+    print("Stepped {frames}/{count} frames at {fps:.1f} fps".format(**result))
+    if result["error"] is not None:
+        print("Error: {}".format(result["error"]))
+    print("Server requests: {}".format(server.requests))
+    # x gets flipped for league
+    print("Last camera x: {} (expected {})".format(server.state.render["cameraPosition"]["x"], -args.frames))
+
+    MTLR.Sender.shutdown()
+    server.stop()
+    del app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""keyframe reduction benchmark. Runs Simplify over synthetic tracks of growing length and reports the time, the keys
+that are left and the largest error against the original keys. The periodic track swings across the line between its
+first and last key every few frames, which is the worst case for splitting segments one key at a time. Doesn't need
+maya, any python with numpy works:
+
+    python benchmarks/simplify.py --frames 10000 20000 40000 100000 --tolerance 0.01
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import Simplify
+
+FPS = 30.0
+TRACKS = {
+    "periodic": lambda frames: np.sin(2 * np.pi * frames / 40),
+    "smooth": lambda frames: np.sin(frames / 5),
+    "pan": lambda frames: np.column_stack([frames * 2.0, np.sin(frames / 200) * 50, np.cos(frames / 300) * 20]),
+    "noisy": lambda frames: np.sin(frames / 200) * 50 + np.random.RandomState(0).normal(0, 0.005, len(frames))
+}
+
+
+def max_error(seconds, values, mask):
+    # linear interpolation between the kept keys against every original key
+    values = values.reshape(len(seconds), -1)
+    interpolated = np.column_stack([np.interp(seconds, seconds[mask], column[mask]) for column in values.T])
+    return np.sqrt(np.square(interpolated - values).sum(axis=1)).max()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keyframe reduction benchmark")
+    parser.add_argument("--frames", type=int, nargs="+", default=[10000, 20000, 40000, 100000])
+    parser.add_argument("--tolerance", type=float, default=0.01)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print("{:<10} {:>8} {:>10} {:>8} {:>8} {:>10}".format("track", "frames", "ms", "keys", "ratio", "max error"))
+    for name, track in sorted(TRACKS.items()):
+        for count in args.frames:
+            frames = np.arange(count, dtype=np.float64)
+            seconds = frames / FPS
+            values = track(frames)
+            best = None
+            for _ in range(args.repeat):
+                start = time.time()
+                mask = Simplify.simplify(seconds, values, args.tolerance)
+                elapsed = time.time() - start
+                best = elapsed if best is None else min(best, elapsed)
+            keys = int(mask.sum())
+            print("{:<10} {:>8} {:>10.1f} {:>8} {:>8.1f} {:>10.5f}".format(
+                name, count, best * 1000, keys, Simplify.ratio(count, keys), max_error(seconds, values, mask)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""startup benchmark, measures how long importing everything the ui needs takes and checks that nothing heavy like
+pymel or numpy comes along with it. Every run happens in a fresh mayapy process so nothing is cached between runs.
+Has to be run with mayapy:
+
+    mayapy benchmarks/startup.py --runs 5 --max-ms 500
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# modules opening the ui must not import
+HEAVY = ("pymel.core", "numpy", "Sequence")
+
+
+def child(pymel):
+    # runs inside the fresh process, initializing maya itself isn't part of the measurement
+    import maya.standalone
+    maya.standalone.initialize()
+    sys.path.insert(0, ROOT)
+    start = time.time()
+    if pymel:
+        import pymel.core
+    else:
+        import main
+        import MLTRUI
+    elapsed = time.time() - start
+    print(json.dumps({"ms": elapsed * 1000, "heavy": [name for name in HEAVY if name in sys.modules]}))
+
+
+def run(pymel):
+    args = [sys.executable, os.path.abspath(__file__), "--child"] + (["--pymel"] if pymel else [])
+    output = subprocess.check_output(args).decode("utf-8")
+    # maya may print its own messages, the result is the last line
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="UI startup benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, help="fail if the median import time is above this")
+    parser.add_argument("--pymel", action="store_true", help="also time importing pymel.core for comparison")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.pymel)
+        return
+
+    results = [run(False) for _ in range(args.runs)]
+    times = sorted(result["ms"] for result in results)
+    median = times[len(times) // 2]
+    print("ui imports: median {:.1f} ms, min {:.1f} ms over {} runs".format(median, times[0], args.runs))
+    heavy = sorted(set(name for result in results for name in result["heavy"]))
+    if heavy:
+        print("heavy modules imported: {}".format(", ".join(heavy)))
+    if args.pymel:
+        pymel = sorted(run(True)["ms"] for _ in range(args.runs))
+        print("pymel.core:  median {:.1f} ms".format(pymel[len(pymel) // 2]))
+
+    if heavy or (args.max_ms is not None and median > args.max_ms):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
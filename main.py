@@ -1,10 +1,21 @@
-import MLTRUI
-import pymel.core as pm
+from maya import cmds
 from PySide2 import QtCore
+import os
+import sys
+
+try:
+    from importlib import reload
+except ImportError:
+    # python 2 has it as a builtin
+    pass
 
 callback = None
 window = None
 
+# every module of the package, ordered so each one comes after the modules it imports
+MODULES = ("ReplayApiData", "CameraMath", "FrameEncoder", "Metrics", "Breaker", "Cuts", "SessionLog", "UndoStack",
+           "LeagueDoF", "SequenceFile", "Simplify", "Sequence", "MTLR", "MLTRUI")
+
 
 """
 OLD FUNCTION - DEPRECATED
@@ -20,10 +31,23 @@ def main():
         OpenMaya.MGlobal.displayWarning("Added callback")"""
 
 
+def developer_mode():
+    # set MTLR_DEV=1 to pick up code changes every time the ui opens
+    return os.environ.get("MTLR_DEV", "0") not in ("", "0")
+
+
+def reload_modules():
+    # only modules that were imported already, the rest gets imported fresh anyway. Python 2's implicit relative
+    # imports register them under the package's name
+    package = __name__.rpartition(".")[0]
+    for name in MODULES:
+        for key in (name, package + "." + name):
+            if key in sys.modules:
+                reload(sys.modules[key])
+
+
 # script for opening the QDialog
-def show_ui():
-    # apply changes to the ui
-    reload(MLTRUI)
+def show_ui(developer=None):
     # we need to keep a reference to the window so we store it in a global variable
     global window
 
@@ -35,7 +59,13 @@ def show_ui():
     except AttributeError:
         pass
     else:
-        pm.deleteUI(window.objectName() + "WorkspaceControl")
+        cmds.deleteUI(window.objectName() + "WorkspaceControl")
+
+    # reloading costs time on every open, so it only happens while developing. The old window has to be closed
+    # before, so its cleanup still runs against the modules it was created with
+    if developer_mode() if developer is None else developer:
+        reload_modules()
+    import MLTRUI
 
     # instantiate UI class and make sure it gets deleted when closed
     window = MLTRUI.UI()
@@ -6,10 +6,93 @@ def maya_useNewAPI():
 
 
 kPluginCmdName = "leagueCam"
+kCountFlag = "-c"
+kNameFlag = "-n"
+kTranslateFlag = "-t"
+kPluginNodeName = "leagueDoF"
+# id from the range maya reserves for local plug-ins
+kPluginNodeId = OpenMaya.MTypeId(0x0007F4D0)
+
+
+# noinspection PyMethodOverriding
+class LeagueDoF(OpenMaya.MPxNode):
+    """derives the dof range from the focal point and width. Maya only calls compute when one of the inputs changed
+    and somebody asks for the output, so the live link can read the dof plug as often as it wants"""
+    focalPoint = OpenMaya.MObject()
+    width = OpenMaya.MObject()
+    nearOffset = OpenMaya.MObject()
+    farOffset = OpenMaya.MObject()
+    fov = OpenMaya.MObject()
+
+    dof = OpenMaya.MObject()
+    dofNear = OpenMaya.MObject()
+    dofFocal = OpenMaya.MObject()
+    dofFar = OpenMaya.MObject()
+    dofFov = OpenMaya.MObject()
+
+    def __init__(self):
+        super(LeagueDoF, self).__init__()
+
+    def compute(self, plug, data):
+        if plug != LeagueDoF.dof and (not plug.isChild or plug.parent() != LeagueDoF.dof):
+            return None
+        fp = data.inputValue(LeagueDoF.focalPoint).asFloat()
+        width = data.inputValue(LeagueDoF.width).asFloat()
+        # near = mid - width, far = mid + width, both can be pushed further out with the offsets
+        near = fp - width + data.inputValue(LeagueDoF.nearOffset).asFloat()
+        far = fp + width + data.inputValue(LeagueDoF.farOffset).asFloat()
+
+        output = data.outputValue(LeagueDoF.dof)
+        output.child(LeagueDoF.dofNear).setFloat(max(near, 0))
+        output.child(LeagueDoF.dofFocal).setFloat(fp)
+        output.child(LeagueDoF.dofFar).setFloat(max(far, 0))
+        output.child(LeagueDoF.dofFov).setFloat(data.inputValue(LeagueDoF.fov).asFloat())
+        output.setAllClean()
+        data.setClean(plug)
+
+    @staticmethod
+    def creator():
+        return LeagueDoF()
+
+    @staticmethod
+    def initialize():
+        fn = OpenMaya.MFnNumericAttribute()
+        inputs = [["focalPoint", "fp", 200], ["width", "w", 200], ["nearOffset", "no", 0], ["farOffset", "fo", 0],
+                  ["fov", "fov", 40]]
+        for name, short_name, default in inputs:
+            attr = fn.create(name, short_name, OpenMaya.MFnNumericData.kFloat, default)
+            fn.keyable = True
+            setattr(LeagueDoF, name, attr)
+            LeagueDoF.addAttribute(attr)
+
+        compound = OpenMaya.MFnCompoundAttribute()
+        LeagueDoF.dof = compound.create("dof", "dof")
+        outputs = [["dofNear", "dn"], ["dofFocal", "dfc"], ["dofFar", "df"], ["dofFov", "dfv"]]
+        for name, short_name in outputs:
+            attr = fn.create(name, short_name, OpenMaya.MFnNumericData.kFloat, 0)
+            fn.writable = False
+            fn.storable = False
+            setattr(LeagueDoF, name, attr)
+            compound.addChild(attr)
+        compound.writable = False
+        compound.storable = False
+        LeagueDoF.addAttribute(LeagueDoF.dof)
+
+        for name, _, _ in inputs:
+            LeagueDoF.attributeAffects(getattr(LeagueDoF, name), LeagueDoF.dof)
 
 
 # noinspection PyMethodOverriding,PyAttributeOutsideInit
 class LeagueCam(OpenMaya.MPxCommand):
+    """creates DoF ready cameras, as many as -count says or one per -name/-translate flag. Everything for the whole
+    batch goes into a single MDagModifier, and the renames that depend on the names maya picked into a second one, so
+    creating hundreds of cameras is two DG updates and one undo step:
+
+        leagueCam -count 3;
+        leagueCam -name "shotA" -translate 0 100 0 -name "shotB" -translate 0 100 500;
+    """
+    attr_list = [["dofSep", "dS"], ["focalPoint", "fp"], ["width", "w"], ["nearOffset", "no"], ["farOffset", "fo"],
+                 ["near", "n"], ["far", "f"], ["fovSep", "fS"], ["fov", "fov"]]
 
     def __init__(self):
         super(LeagueCam, self).__init__()
@@ -17,36 +100,78 @@ class LeagueCam(OpenMaya.MPxCommand):
             "dofSep": "DoF",
             "focalPoint": 200,
             "width": 200,
-            "near": 400,
-            "far": 0,
-            "oldWidth": 200,
-            "oldMid": 200,
+            "nearOffset": 0,
+            "farOffset": 0,
+            "near": 0,
+            "far": 400,
             "fov": 40
         }
 
     def doIt(self, args):
-        self.redoIt()
+        db = OpenMaya.MArgDatabase(self.syntax(), args)
+        names = [db.getFlagArgumentList(kNameFlag, i).asString(0) for i in range(db.numberOfFlagUses(kNameFlag))]
+        translates = [db.getFlagArgumentList(kTranslateFlag, i) for i in range(db.numberOfFlagUses(kTranslateFlag))]
+        translates = [(arg.asDouble(0), arg.asDouble(1), arg.asDouble(2)) for arg in translates]
+        count = db.flagArgumentInt(kCountFlag, 0) if db.isFlagSet(kCountFlag) else 1
+        count = max(count, len(names), len(translates))
+
+        self.modifier = OpenMaya.MDagModifier()
+        self.cameras = []
+        for i in range(count):
+            name = names[i] if i < len(names) else "camera"
+            self.cameras.append(self.add_camera(name, translates[i] if i < len(translates) else None))
+        self.modifier.doIt()
+        # maya makes the transform names unique, the shape and dof node follow the name the transform ended up with
+        self.names = OpenMaya.MDGModifier()
+        for transform, shape, dof_node in self.cameras:
+            name = OpenMaya.MFnDependencyNode(transform.object()).name()
+            self.names.renameNode(shape.object(), "{}Shape".format(name))
+            self.names.renameNode(dof_node.object(), "{}DoF".format(name))
+        self.names.doIt()
+        self.finish()
+
+    def add_camera(self, name, translate):
+        # only queues the camera on the modifier, connections use attribute objects so they don't need the plugs yet
+        modifier = self.modifier
+        transform = modifier.createNode("transform")
+        modifier.renameNode(transform, name)
+        shape = modifier.createNode("camera", transform)
+
+        attrs = {}
+        for attr_names in self.attr_list:
+            attrs[attr_names[0]] = self.create_attr(attr_names)
+            modifier.addAttribute(transform, attrs[attr_names[0]])
+
+        # the dof node does the actual math, the camera only holds the inputs and shows the result
+        dof_node = modifier.createNode(kPluginNodeId)
+        for attr in ("focalPoint", "width", "nearOffset", "farOffset", "fov"):
+            modifier.connect(transform, attrs[attr], dof_node, getattr(LeagueDoF, attr))
+        modifier.connect(dof_node, LeagueDoF.dofNear, transform, attrs["near"])
+        modifier.connect(dof_node, LeagueDoF.dofFar, transform, attrs["far"])
+
+        if translate is not None:
+            fn = OpenMaya.MFnDependencyNode(transform)
+            for axis, value in zip("XYZ", translate):
+                modifier.newPlugValueDouble(fn.findPlug("translate" + axis, False), value)
+        return OpenMaya.MObjectHandle(transform), OpenMaya.MObjectHandle(shape), OpenMaya.MObjectHandle(dof_node)
 
     def redoIt(self):
-        dag_node = OpenMaya.MFnDagNode()
-        self.transform = dag_node.create("transform", "camera")
-        name = OpenMaya.MFnDependencyNode(self.transform).name()
-        dag_node.create("camera", "{}Shape".format(name), self.transform)
-
-        attr_list = [["dofSep", "dS"], ["focalPoint", "fp"], ["width", "w"], ["near", "n"], ["far", "f"],
-                     ["oldWidth", "ow"], ["oldMid", "om"], ["fovSep", "fS"], ["fov", "fov"]]
-
-        for attrs in attr_list:
-            attr = self.create_attr(attrs)
-            mdg = OpenMaya.MDGModifier()
-            mdg.addAttribute(self.transform, attr)
-            mdg.doIt()
-
-        dag = OpenMaya.MFnDagNode(self.transform)
-        dag.findPlug("dofSep", False).isLocked = True
-        dag.findPlug("fovSep", False).isLocked = True
-
-        OpenMaya.MGlobal.selectByName(name, OpenMaya.MGlobal.kReplaceList)
+        self.modifier.doIt()
+        self.names.doIt()
+        self.finish()
+
+    def finish(self):
+        # locking isn't something the modifier can do, it goes away with the nodes on undo anyway
+        sel_list = OpenMaya.MSelectionList()
+        self.clearResult()
+        for handle, _, _ in self.cameras:
+            transform = handle.object()
+            dag = OpenMaya.MFnDagNode(transform)
+            dag.findPlug("dofSep", False).isLocked = True
+            dag.findPlug("fovSep", False).isLocked = True
+            sel_list.add(dag.getPath())
+            self.appendToResult(dag.name())
+        OpenMaya.MGlobal.setActiveSelectionList(sel_list, OpenMaya.MGlobal.kReplaceList)
 
     def create_attr(self, attrs):
         if attrs[0] == "dofSep" or attrs[0] == "fovSep":
@@ -65,17 +190,23 @@ class LeagueCam(OpenMaya.MPxCommand):
         if attrs[0] == "fov":
             fn.setMax(180)
             fn.setNiceNameOverride("FoV")
+        elif attrs[0] == "nearOffset" or attrs[0] == "farOffset":
+            fn.setMin(-1000)
         else:
             fn.setMax(1000)
-        fn.setMin(0)
-        if attrs[0] == "oldWidth" or attrs[0] == "oldMid":
+        if attrs[0] != "nearOffset" and attrs[0] != "farOffset":
+            fn.setMin(0)
+        # near and far are driven by the dof node, they are only there to show the result
+        if attrs[0] == "near" or attrs[0] == "far":
             fn.keyable = False
+            fn.channelBox = True
         else:
             fn.keyable = True
         return attr
 
     def undoIt(self):
-        OpenMaya.MGlobal.deleteNode(self.transform)
+        self.names.undoIt()
+        self.modifier.undoIt()
 
     def isUndoable(self):
         return True
@@ -85,10 +216,25 @@ def cmdCreator():
     return LeagueCam()
 
 
+def syntaxCreator():
+    syntax = OpenMaya.MSyntax()
+    syntax.addFlag(kCountFlag, "-count", OpenMaya.MSyntax.kUnsigned)
+    syntax.addFlag(kNameFlag, "-name", OpenMaya.MSyntax.kString)
+    syntax.makeFlagMultiUse(kNameFlag)
+    syntax.addFlag(kTranslateFlag, "-translate", OpenMaya.MSyntax.kDouble, OpenMaya.MSyntax.kDouble,
+                   OpenMaya.MSyntax.kDouble)
+    syntax.makeFlagMultiUse(kTranslateFlag)
+    return syntax
+
+
 def initializePlugin(mobject):
     mplugin = OpenMaya.MFnPlugin(mobject)
     try:
-        mplugin.registerCommand(kPluginCmdName, cmdCreator)
+        mplugin.registerNode(kPluginNodeName, kPluginNodeId, LeagueDoF.creator, LeagueDoF.initialize)
+    except:
+        OpenMaya.MGlobal.displayError("Failed to register node: " + kPluginNodeName)
+    try:
+        mplugin.registerCommand(kPluginCmdName, cmdCreator, syntaxCreator)
     except:
         OpenMaya.MGlobal.displayError("Failed to register command: " + kPluginCmdName)
 
@@ -99,3 +245,7 @@ def uninitializePlugin(mobject):
         mplugin.deregisterCommand(kPluginCmdName)
     except:
         OpenMaya.MGlobal.displayError("Failed to deregister command: " + kPluginCmdName)
+    try:
+        mplugin.deregisterNode(kPluginNodeId)
+    except:
+        OpenMaya.MGlobal.displayError("Failed to deregister node: " + kPluginNodeName)
@@ -0,0 +1,104 @@
+import pytest
+
+import Breaker
+import Metrics
+
+
+@pytest.fixture
+def now(monkeypatch):
+    # a clock the tests move by hand
+    clock = [100.0]
+    monkeypatch.setattr(Metrics, "clock", lambda: clock[0])
+    return clock
+
+
+def up(**kwargs):
+    breaker = Breaker.CircuitBreaker(**kwargs)
+    breaker.success()
+    return breaker
+
+
+def test_starts_probing():
+    breaker = Breaker.CircuitBreaker()
+    assert breaker.state == Breaker.PROBING
+    assert not breaker.allowed
+
+
+def test_threshold_trips_the_breaker(now):
+    breaker = up(threshold=3)
+    assert not breaker.failure()
+    assert not breaker.failure()
+    assert breaker.allowed
+    assert breaker.failure()
+    assert breaker.state == Breaker.DOWN
+    assert not breaker.allowed
+
+
+def test_success_resets_the_failures(now):
+    breaker = up(threshold=3)
+    breaker.failure()
+    breaker.failure()
+    assert not breaker.success()
+    assert not breaker.failure()
+    assert not breaker.failure()
+    assert breaker.state == Breaker.UP
+
+
+def test_failures_while_down_change_nothing(now):
+    breaker = up(threshold=1, delay=0.5)
+    assert breaker.failure()
+    retry_at = breaker.retry_at
+    # requests that were already on their way when it opened
+    assert not breaker.failure()
+    assert breaker.retry_at == retry_at
+    assert breaker.state == Breaker.DOWN
+
+
+def test_delay_doubles_up_to_max_delay(now):
+    breaker = up(threshold=1, delay=0.5, max_delay=3.0)
+    breaker.failure()
+    waits = []
+    for _ in range(6):
+        waits.append(breaker.retry_in())
+        breaker.probe()
+        assert breaker.state == Breaker.PROBING
+        # a failed probe opens the breaker right away
+        assert breaker.failure()
+    assert waits == [0.5, 1.0, 2.0, 3.0, 3.0, 3.0]
+
+
+def test_successful_probe_closes_and_resets_the_delay(now):
+    breaker = up(threshold=1, delay=0.5)
+    breaker.failure()
+    breaker.probe()
+    breaker.failure()
+    breaker.probe()
+    assert breaker.success()
+    assert breaker.state == Breaker.UP
+    assert breaker.retry_at is None
+    assert breaker.retry_in() == 0.0
+    breaker.failure()
+    assert breaker.retry_in() == 0.5
+
+
+def test_probe_only_opens_a_down_breaker():
+    breaker = up()
+    breaker.probe()
+    assert breaker.state == Breaker.UP
+
+
+def test_trip_opens_regardless_of_the_threshold(now):
+    breaker = up(threshold=5)
+    assert breaker.trip()
+    assert breaker.state == Breaker.DOWN
+    assert not breaker.trip()
+
+
+def test_retry_in_counts_down(now):
+    breaker = up(threshold=1, delay=2.0)
+    breaker.failure()
+    assert breaker.retry_in() == 2.0
+    now[0] += 1.5
+    assert breaker.retry_in() == pytest.approx(0.5)
+    now[0] += 1.0
+    assert breaker.retry_in() == 0.0
@@ -0,0 +1,161 @@
+import numpy as np
+import pytest
+
+import CameraMath
+
+
+def pan(start, end, step=5.0):
+    # a camera turning around y (yaw) from start to end degrees, as (N, 6) translate and rotate values
+    transforms = np.zeros((int(round((end - start) / step)) + 1, 6))
+    transforms[:, 4] = np.radians(np.linspace(start, end, len(transforms)))
+    return transforms
+
+
+@pytest.mark.parametrize("order", range(6))
+def test_unwrap_pan_across_180(order):
+    transforms = pan(170, 190)
+    # the same camera orientation in every rotate order
+    transforms[:, 3:] = CameraMath.reorder(transforms[:, 3:], 0, order)
+    rotation = CameraMath.unwrap(CameraMath.to_league(transforms, order)[1])
+    steps = np.abs(np.diff(rotation, axis=0))
+    assert steps.max() == pytest.approx(5.0)
+
+
+def test_unwrap_keeps_runs_apart():
+    angles = np.array([[170.0, 0, 0], [-175.0, 0, 0], [10.0, 0, 0], [-10.0, 0, 0]])
+    result = CameraMath.unwrap(angles, [2])
+    np.testing.assert_allclose(result[:, 0], [170, 185, 10, -10])
+
+
+def test_unwrap_leaves_input_alone():
+    angles = np.array([[179.0, 0, 0], [-179.0, 0, 0]])
+    CameraMath.unwrap(angles)
+    assert angles[1, 0] == -179.0
+
+
+def reference_matrix(angles, order):
+    # maya's rotation matrix written out independently of CameraMath: the first axis of the order is applied first
+    x, y, z = angles
+    axes = {
+        "x": np.array([[1, 0, 0], [0, np.cos(x), -np.sin(x)], [0, np.sin(x), np.cos(x)]]),
+        "y": np.array([[np.cos(y), 0, np.sin(y)], [0, 1, 0], [-np.sin(y), 0, np.cos(y)]]),
+        "z": np.array([[np.cos(z), -np.sin(z), 0], [np.sin(z), np.cos(z), 0], [0, 0, 1]])
+    }
+    first, second, third = CameraMath.ROTATE_ORDERS[order]
+    return axes[third].dot(axes[second]).dot(axes[first])
+
+
+# (angles, source order, target order, expected) in degrees, each follows from the definition of the orders:
+# xyz (40, 30, 0) is Ry Rx, which is zxy with z = 0. A single axis stays the same in every order
+KNOWN = [
+    ((40, 30, 0), 0, 2, (40, 30, 0)),
+    ((0, 40, 70), 0, 1, (0, 40, 70)),
+    ((30, 0, 0), 0, 5, (30, 0, 0)),
+    ((0, 0, -120), 3, 4, (0, 0, -120)),
+    ((0, 90, 0), 2, 0, (0, 90, 0)),
+]
+
+
+@pytest.mark.parametrize("angles, source, target, expected", KNOWN)
+def test_reorder_known(angles, source, target, expected):
+    result = np.degrees(CameraMath.reorder_euler(np.radians(angles), source, target))
+    np.testing.assert_allclose(result, expected, atol=1e-9)
+    batched = np.degrees(CameraMath.reorder(np.radians([angles]), source, target))[0]
+    np.testing.assert_allclose(batched, expected, atol=1e-9)
+
+
+def random_angles(count=200, seed=3):
+    return np.random.RandomState(seed).uniform(-np.pi, np.pi, (count, 3))
+
+
+@pytest.mark.parametrize("source", range(6))
+@pytest.mark.parametrize("target", range(6))
+def test_reorder_keeps_the_rotation(source, target):
+    angles = random_angles()
+    result = CameraMath.reorder(angles, source, target)
+    for before, after in zip(angles, result):
+        np.testing.assert_allclose(reference_matrix(after, target), reference_matrix(before, source), atol=1e-9)
+    if source == target:
+        return
+    # the middle axis always ends up within +-90 degrees, the same branch MEulerRotation.reorder picks
+    middle = "xyz".index(CameraMath.ROTATE_ORDERS[target][1])
+    assert np.all(np.abs(result[:, middle]) <= np.pi / 2 + 1e-12)
+
+
+@pytest.mark.parametrize("order", range(6))
+def test_rotation_matrix_matches_reference(order):
+    for angles in random_angles(20):
+        np.testing.assert_allclose(CameraMath.rotation_matrix(angles, order), reference_matrix(angles, order),
+                                   atol=1e-12)
+        np.testing.assert_allclose(CameraMath.rotation_matrices([angles], order)[0],
+                                   reference_matrix(angles, order), atol=1e-12)
+
+
+@pytest.mark.parametrize("order", range(6))
+def test_scalar_and_batched_agree(order):
+    angles = random_angles(50)
+    transforms = np.hstack([np.random.RandomState(4).uniform(-1000, 1000, (50, 3)), angles])
+    dof = np.random.RandomState(5).uniform(0, 500, (50, 4))
+
+    position, rotation = CameraMath.to_league(transforms, order)
+    batch = CameraMath.render_batch(transforms, dof, order)
+    back = CameraMath.from_league(position, rotation, order)
+    for i, transform in enumerate(transforms):
+        scalar_position, scalar_rotation = CameraMath.camera_to_league(transform, order)
+        np.testing.assert_allclose(position[i], scalar_position, atol=1e-9)
+        np.testing.assert_allclose(rotation[i], scalar_rotation, atol=1e-9)
+        np.testing.assert_allclose(batch[i], CameraMath.render_frame(transform, dof[i], order), atol=1e-9)
+        np.testing.assert_allclose(back[i], CameraMath.league_to_camera(position[i], rotation[i], order), atol=1e-9)
+        np.testing.assert_allclose(CameraMath.reorder(angles[i:i + 1], order)[0],
+                                   CameraMath.reorder_euler(angles[i], order), atol=1e-9)
+
+
+def assert_same_camera(a, b, order):
+    # angles can differ by whole turns or, at gimbal lock, between axes, the position and orientation may not
+    np.testing.assert_allclose(a[:3], b[:3], atol=1e-9)
+    np.testing.assert_allclose(reference_matrix(a[3:], order), reference_matrix(b[3:], order), atol=1e-9)
+
+
+@pytest.mark.parametrize("order", range(6))
+def test_league_round_trip(order):
+    transforms = np.hstack([np.random.RandomState(6).uniform(-1000, 1000, (100, 3)), random_angles(100)])
+    back = CameraMath.from_league(*CameraMath.to_league(transforms, order), order=order)
+    for before, after in zip(transforms, back):
+        assert_same_camera(before, after, order)
+        scalar = CameraMath.league_to_camera(*CameraMath.camera_to_league(before, order), order=order)
+        assert_same_camera(before, np.array(scalar), order)
+
+
+@pytest.mark.parametrize("order", range(6))
+@pytest.mark.parametrize("pitch", [90, -90])
+def test_league_round_trip_gimbal_lock(order, pitch):
+    # looking straight up or down puts league's zxy order into gimbal lock, the middle axis is x
+    league = np.radians([[pitch, 30, 0], [pitch, -75, 0], [pitch, 160, 0]])
+    transforms = np.zeros((3, 6))
+    transforms[:, 3:] = CameraMath.reorder(league, CameraMath.LEAGUE_ORDER, order)
+    position, rotation = CameraMath.to_league(transforms, order)
+    assert np.all(np.isfinite(rotation))
+    back = CameraMath.from_league(position, rotation, order)
+    for before, after in zip(transforms, back):
+        assert_same_camera(before, after, order)
+        scalar = CameraMath.league_to_camera(*CameraMath.camera_to_league(before, order), order=order)
+        assert_same_camera(before, np.array(scalar), order)
+
+
+def test_dof_range_and_inputs():
+    near, far = CameraMath.dof_range(200, 50, 10, -20)
+    assert (near, far) == (160, 230)
+    # near can't go behind the camera
+    assert CameraMath.dof_range(20, 50) == (0.0, 70)
+
+    near = np.array([150.0, 10.0, 0.0])
+    mid = np.array([200.0, 20.0, 5.0])
+    far = np.array([260.0, 40.0, 10.0])
+    fp, width, offset = CameraMath.dof_inputs(near, mid, far)
+    np.testing.assert_allclose(fp, mid)
+    for i in range(3):
+        np.testing.assert_allclose(CameraMath.dof_range(fp[i], width[i], offset[i], offset[i]), (near[i], far[i]))
+
+
+def test_dof_to_league():
+    assert CameraMath.dof_to_league(1, 2, 3) == (10, 20, 30)
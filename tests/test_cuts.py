@@ -0,0 +1,76 @@
+import pytest
+
+import Cuts
+
+
+def edit():
+    # two cuts with a gap between them and one right after the second
+    return Cuts.CutList([(10, 20, "a"), (25, 30, "b"), (30, 40, "c")])
+
+
+def test_add_keeps_cuts_sorted():
+    cuts = Cuts.CutList([(25, 30, "b"), (10, 20, "a")])
+    assert list(cuts) == [(10, 20, "a"), (25, 30, "b")]
+
+
+def test_add_trims_what_it_covers():
+    cuts = edit()
+    cuts.add(15, 27, "d")
+    assert list(cuts) == [(10, 15, "a"), (15, 27, "d"), (27, 30, "b"), (30, 40, "c")]
+
+
+def test_add_splits_the_cut_it_lands_in():
+    cuts = Cuts.CutList([(0, 100, "a")])
+    cuts.add(40, 60, "b")
+    assert list(cuts) == [(0, 40, "a"), (40, 60, "b"), (60, 100, "a")]
+
+
+def test_add_removes_covered_cuts():
+    cuts = edit()
+    cuts.add(0, 50, "d")
+    assert list(cuts) == [(0, 50, "d")]
+
+
+def test_add_rejects_empty_cuts():
+    with pytest.raises(ValueError):
+        Cuts.CutList().add(10, 10, "a")
+
+
+@pytest.mark.parametrize("frame, camera", [
+    (9.99, None), (10, "a"), (19.99, "a"), (20, None), (25, "b"), (29.5, "b"), (30, "c"), (40, None)
+])
+def test_camera_half_open(frame, camera):
+    assert edit().camera(frame) == camera
+
+
+def test_segments_cover_gaps():
+    assert list(edit().segments(0, 50)) == [
+        (0, 10, None), (10, 20, 0), (20, 25, None), (25, 30, 1), (30, 40, 2), (40, 50, None)
+    ]
+
+
+def test_segments_start_and_end_inside_cuts():
+    assert list(edit().segments(15, 27)) == [(15, 20, 0), (20, 25, None), (25, 27, 1)]
+
+
+def test_segments_are_consecutive():
+    cuts = edit()
+    for start, end in [(0, 50), (12.5, 33.25), (20, 25), (45, 60), (5, 6)]:
+        segments = list(cuts.segments(start, end))
+        assert segments[0][0] == start
+        assert segments[-1][1] == end
+        for (_, first_end, _), (second_start, _, _) in zip(segments, segments[1:]):
+            assert first_end == second_start
+        for segment_start, segment_end, i in segments:
+            assert segment_start < segment_end
+            assert cuts.index(segment_start) == i
+
+
+def test_segments_without_cuts():
+    assert list(Cuts.CutList().segments(0, 10)) == [(0, 10, None)]
+    assert list(edit().segments(5, 5)) == []
+
+
+def test_unique_cameras_in_edit_order():
+    cuts = Cuts.CutList([(0, 10, "b"), (10, 20, "a"), (20, 30, "b")])
+    assert cuts.unique_cameras() == ["b", "a"]
@@ -0,0 +1,72 @@
+import itertools
+import json
+
+import pytest
+
+import FrameEncoder
+
+VALUES = {
+    "camera": (1.5, -2.25, 300.0, 0.0, -90.125, 45.5),
+    "dof": (10.0, 250.5, 1000.0),
+    "fov": (40.0,),
+    "playback": (FrameEncoder.TRUE, 1.0, 12.5)
+}
+
+
+def expected(shape, values):
+    # what json.dumps makes of the same frame
+    if shape == "camera":
+        return {"cameraPosition": dict(zip("xyz", values[:3])), "cameraRotation": dict(zip("xyz", values[3:]))}
+    if shape == "dof":
+        return dict(zip(("depthOfFieldNear", "depthOfFieldMid", "depthOfFieldFar"), values))
+    if shape == "fov":
+        return {"fieldOfView": values[0]}
+    return {"paused": values[0] == FrameEncoder.TRUE, "speed": values[1], "time": values[2]}
+
+
+COMBINATIONS = [shapes for count in range(1, len(VALUES) + 1)
+                for shapes in itertools.combinations(sorted(VALUES), count)]
+
+
+@pytest.mark.parametrize("shapes", COMBINATIONS, ids="-".join)
+def test_matches_json_dumps(shapes):
+    encoder = FrameEncoder.FrameEncoder()
+    body = encoder.encode(shapes, tuple(value for shape in shapes for value in VALUES[shape]))
+    data = {}
+    for shape in shapes:
+        data.update(expected(shape, VALUES[shape]))
+    assert json.loads(body.decode("ascii")) == json.loads(json.dumps(data))
+
+
+def test_sizes_match_the_fields():
+    for shape, field in FrameEncoder.FrameEncoder.fields.items():
+        assert field.count(b"%") == FrameEncoder.FrameEncoder.sizes[shape]
+
+
+@pytest.mark.parametrize("precision", [0, 2, 4, 6])
+def test_precision(precision):
+    encoder = FrameEncoder.FrameEncoder(precision)
+    body = encoder.encode(("fov",), (1.23456789,))
+    assert json.loads(body.decode("ascii")) == {"fieldOfView": round(1.23456789, precision)}
+
+
+@pytest.mark.parametrize("paused", [True, False])
+def test_boolean(paused):
+    encoder = FrameEncoder.FrameEncoder()
+    body = encoder.encode(("playback",), (encoder.boolean(paused), 1.0, 0.0))
+    assert json.loads(body.decode("ascii"))["paused"] is paused
+
+
+def test_templates_are_cached():
+    encoder = FrameEncoder.FrameEncoder()
+    assert encoder.template(("camera", "fov")) is encoder.template(("camera", "fov"))
+
+
+@pytest.mark.parametrize("value", [float("nan"), float("inf"), float("-inf")])
+@pytest.mark.parametrize("shape", ["camera", "dof", "fov"])
+def test_rejects_values_that_are_not_finite(shape, value):
+    encoder = FrameEncoder.FrameEncoder()
+    values = list(VALUES[shape])
+    values[-1] = value
+    with pytest.raises(ValueError):
+        encoder.encode((shape,), tuple(values))
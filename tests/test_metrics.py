@@ -0,0 +1,88 @@
+import csv
+import json
+
+import pytest
+
+import Metrics
+
+# one bucket's upper edge over its lower one
+BUCKET = 10 ** (1 / 8.0)
+
+
+def histogram(values):
+    result = Metrics.Histogram()
+    for value in values:
+        result.add(value)
+    return result
+
+
+def test_empty_histogram():
+    empty = Metrics.Histogram()
+    assert empty.percentile(0.5) is None
+    assert empty.summary() == {"count": 0, "mean": None, "p50": None, "p99": None, "max": 0.0}
+
+
+@pytest.mark.parametrize("value", [0.0, 2e-7, 0.00123, 0.5, 42.0])
+def test_single_sample(value):
+    summary = histogram([value]).summary()
+    # a bucket's edge is never reported above what was measured
+    assert summary == {"count": 1, "mean": value, "p50": value, "p99": value, "max": value}
+
+
+def test_percentiles_are_within_a_bucket():
+    values = [i / 1000.0 for i in range(1, 101)]
+    result = histogram(values)
+    for fraction, exact in ((0.1, 0.01), (0.5, 0.05), (0.9, 0.09), (0.99, 0.099)):
+        assert exact <= result.percentile(fraction) <= exact * BUCKET
+    assert result.percentile(1.0) == 0.1
+
+
+def test_summary():
+    values = [0.001] * 98 + [0.2, 0.3]
+    summary = histogram(values).summary()
+    assert summary["count"] == 100
+    assert summary["mean"] == pytest.approx(sum(values) / 100)
+    assert 0.001 <= summary["p50"] <= 0.001 * BUCKET
+    assert 0.2 <= summary["p99"] <= 0.2 * BUCKET
+    assert summary["max"] == 0.3
+
+
+def test_counters_and_reset():
+    metrics = Metrics.Metrics()
+    metrics.count("sent")
+    metrics.count("superseded", 3)
+    metrics.record("encode", 0.001)
+    summary = metrics.summary()
+    assert summary["counters"]["sent"] == 1
+    assert summary["counters"]["superseded"] == 3
+    assert set(summary["counters"]) == set(Metrics.COUNTERS)
+    assert summary["stages"]["encode"]["count"] == 1
+    metrics.reset()
+    assert not metrics.counters
+    assert metrics.stages["encode"].count == 0
+
+
+def test_bottleneck():
+    metrics = Metrics.Metrics()
+    assert metrics.bottleneck() is None
+    metrics.record("read", 0.001)
+    metrics.record("reply", 0.05)
+    assert metrics.bottleneck() == "reply"
+
+
+def test_dump(tmp_path):
+    metrics = Metrics.Metrics()
+    metrics.record("read", 0.002)
+    metrics.count("sent", 2)
+    data = tmp_path / "metrics.json"
+    assert metrics.dump(str(data)) == 1
+    dumped = json.loads(data.read_text())
+    assert dumped["counters"]["sent"] == 2
+    assert [event["stage"] for event in dumped["trace"]] == ["read"]
+    table = tmp_path / "metrics.csv"
+    assert metrics.dump(str(table)) == 1
+    with open(str(table)) as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["time", "stage", "ms"]
+    assert rows[1][1:] == ["read", "2.0000"]
+    assert ["sent", "2"] in rows
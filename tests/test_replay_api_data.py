@@ -0,0 +1,46 @@
+import pytest
+
+import ReplayApiData
+
+
+@pytest.fixture(autouse=True)
+def restore_clients():
+    # set_clients changes the module's client list for everyone
+    clients = list(ReplayApiData.clients)
+    yield
+    ReplayApiData.set_clients(clients)
+
+
+@pytest.mark.parametrize("text, hosts", [
+    ("127.0.0.1:2999", [("127.0.0.1", 2999, 1)]),
+    (":3000", [("127.0.0.1", 3000, 1)]),
+    ("10.0.0.5:3000/3", [("10.0.0.5", 3000, 3)]),
+    (" 127.0.0.1:2999 , game-pc:2999/2, ", [("127.0.0.1", 2999, 1), ("game-pc", 2999, 2)]),
+    # the first entry of a client wins
+    ("127.0.0.1:2999/4, 127.0.0.1:2999, :2999/2", [("127.0.0.1", 2999, 4)]),
+])
+def test_parse_clients(text, hosts):
+    assert ReplayApiData.parse_clients(text) == hosts
+
+
+@pytest.mark.parametrize("text", [
+    "", " , ", "127.0.0.1", "127.0.0.1:", "127.0.0.1:port", "127.0.0.1:0", "127.0.0.1:65536", "127.0.0.1:-1",
+    "127.0.0.1:2999/", "127.0.0.1:2999/0", "127.0.0.1:2999/two", "127.0.0.1:2999/-1", "127.0.0.1:2999, nope"
+])
+def test_parse_clients_rejects(text):
+    with pytest.raises(ValueError):
+        ReplayApiData.parse_clients(text)
+
+
+def test_format_round_trip():
+    text = "127.0.0.1:2999, 10.0.0.5:3000/3"
+    hosts = ReplayApiData.parse_clients(text)
+    assert ReplayApiData.format_clients(hosts) == text
+    assert ReplayApiData.parse_clients(ReplayApiData.format_clients(hosts)) == hosts
+
+
+def test_set_clients():
+    ReplayApiData.set_clients([("10.0.0.5", "3000"), ("10.0.0.6", 3001, 2)])
+    assert ReplayApiData.clients == [("10.0.0.5", 3000, 1), ("10.0.0.6", 3001, 2)]
+    # everything that needs a reply goes to the primary
+    assert ReplayApiData.urls["playback"] == "https://10.0.0.5:3000/replay/playback"
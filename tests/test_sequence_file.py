@@ -0,0 +1,62 @@
+import io
+import json
+
+import numpy as np
+import pytest
+
+import SequenceFile
+
+SEQUENCE = {
+    "cameraPosition": [
+        {"time": 0.0, "value": {"x": 12345.678, "y": -0.5, "z": 1e-05}, "blend": "linear"},
+        {"time": 0.016666666666666666, "value": {"x": 12346.0, "y": -0.25, "z": 2.5e+03}, "blend": "linear"},
+    ],
+    "playbackSpeed": 1.0,
+    "fieldOfView": [
+        {"time": 0.0, "value": 40.0, "blend": "linear"},
+        {"time": 123.456789, "value": 65.125, "blend": "snap"},
+    ],
+    "depthOfFieldNear": [],
+    "selectionName": "a \"quoted\" name with ] and } in it",
+    "depthOfFieldFar": [{"time": 1, "value": 100000}],
+}
+
+
+def expected():
+    keys = []
+    for name, value in SEQUENCE.items():
+        if isinstance(value, list):
+            keys.extend((name, key) for key in value)
+    return keys
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 16, 61, 1 << 16])
+@pytest.mark.parametrize("indent", [None, 4])
+def test_chunk_boundaries(chunk_size, indent):
+    # every chunk size cuts the file somewhere else, through numbers, strings and delimiters
+    text = json.dumps(SEQUENCE, indent=indent)
+    assert list(SequenceFile.StreamReader(io.StringIO(text), chunk_size)) == expected()
+
+
+@pytest.mark.parametrize("text", ["{}", " { } ", "{\"fieldOfView\": []}"])
+def test_empty(text):
+    assert list(SequenceFile.StreamReader(io.StringIO(text), 1)) == []
+
+
+@pytest.mark.parametrize("text", ["", "{\"fieldOfView\": [{\"time\": 0.0", "{\"fieldOfView\": [], ", "[]"])
+def test_broken_files_raise(text):
+    with pytest.raises(ValueError):
+        list(SequenceFile.StreamReader(io.StringIO(text), 4))
+
+
+def test_read_into_arrays(tmp_path):
+    path = tmp_path / "sequence.json"
+    path.write_text(json.dumps(SEQUENCE))
+    tracks = SequenceFile.read(str(path))
+    assert sorted(tracks) == ["cameraPosition", "depthOfFieldFar", "fieldOfView"]
+    seconds, values = tracks["cameraPosition"]
+    np.testing.assert_allclose(seconds, [0.0, 0.016666666666666666])
+    np.testing.assert_allclose(values, [[12345.678, -0.5, 1e-05], [12346.0, -0.25, 2500.0]])
+    seconds, values = tracks["fieldOfView"]
+    assert values.shape == (2,)
+    np.testing.assert_allclose(values, [40.0, 65.125])
@@ -0,0 +1,87 @@
+import pytest
+
+import SessionLog
+
+RECORDS = [
+    (1000.0, "render", b'{"cameraPosition":{"x":1.0}}'),
+    (1000.016, "playback", b'{"time":12.5}'),
+    (1000.5, "sequence", b""),
+    (1001.0, "render", b"\x00\xff" * 100),
+]
+
+
+def record(path, records=RECORDS, flush_size=1 << 16):
+    recorder = SessionLog.Recorder(str(path), flush_size)
+    for stamp, url, body in records:
+        recorder.write(stamp, url, body)
+    recorder.close()
+    return recorder
+
+
+def read(path):
+    with SessionLog.Reader(str(path)) as reader:
+        return list(reader)
+
+
+@pytest.mark.parametrize("flush_size", [1, 64, 1 << 16])
+def test_round_trip(tmp_path, flush_size):
+    path = tmp_path / "session.mtlr"
+    recorder = record(path, flush_size=flush_size)
+    assert recorder.count == len(RECORDS)
+    assert read(path) == RECORDS
+
+
+def test_text_bodies_are_encoded(tmp_path):
+    path = tmp_path / "session.mtlr"
+    record(path, [(1.0, "playback", u"{\"time\":1.0}")])
+    assert read(path) == [(1.0, "playback", b"{\"time\":1.0}")]
+
+
+def test_reopening_appends(tmp_path):
+    path = tmp_path / "session.mtlr"
+    record(path, RECORDS[:2])
+    record(path, RECORDS[2:])
+    assert read(path) == RECORDS
+
+
+def test_empty_log(tmp_path):
+    path = tmp_path / "session.mtlr"
+    record(path, [])
+    assert read(path) == []
+
+
+def test_writes_after_close_are_dropped(tmp_path):
+    path = tmp_path / "session.mtlr"
+    recorder = record(path, RECORDS[:1])
+    recorder.write(*RECORDS[1])
+    assert read(path) == RECORDS[:1]
+
+
+@pytest.mark.parametrize("cut", [1, SessionLog.HEAD.size, SessionLog.HEAD.size + 5])
+def test_cut_off_record_ends_the_log(tmp_path, cut):
+    path = tmp_path / "session.mtlr"
+    record(path)
+    data = path.read_bytes()
+    last = SessionLog.HEAD.size + len(RECORDS[-1][2])
+    path.write_bytes(data[:len(data) - last + cut])
+    assert read(path) == RECORDS[:-1]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not a session log")
+    with pytest.raises(ValueError):
+        SessionLog.Reader(str(path))
+
+
+def test_compare(tmp_path):
+    first, same, other, shorter = (tmp_path / name for name in ("first", "same", "other", "shorter"))
+    record(first)
+    # timing doesn't matter, only what was sent
+    record(same, [(stamp + 5.0, url, body) for stamp, url, body in RECORDS])
+    record(other, RECORDS[:2] + [(1000.5, "sequence", b"[]")] + RECORDS[3:])
+    record(shorter, RECORDS[:3])
+    assert SessionLog.compare(str(first), str(same)) == (len(RECORDS), None)
+    assert SessionLog.compare(str(first), str(other)) == (2, 2)
+    assert SessionLog.compare(str(first), str(shorter)) == (3, 3)
+    assert SessionLog.compare(str(shorter), str(first)) == (3, 3)
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+import Simplify
+
+
+def interpolate(seconds, values, mask):
+    # what the game does between the kept keys
+    values = np.asarray(values, dtype=np.float64).reshape(len(seconds), -1)
+    return np.column_stack([np.interp(seconds, seconds[mask], column[mask]) for column in values.T])
+
+
+def max_error(seconds, values, mask):
+    values = np.asarray(values, dtype=np.float64).reshape(len(seconds), -1)
+    return np.sqrt(np.square(interpolate(seconds, values, mask) - values).sum(axis=1)).max()
+
+
+TRACKS = {
+    "periodic": lambda frames: np.sin(2 * np.pi * frames / 40),
+    "smooth": lambda frames: np.sin(frames / 5),
+    "random walk": lambda frames: np.cumsum(np.random.RandomState(1).normal(0, 1, len(frames))),
+    "vector": lambda frames: np.column_stack([frames * 2.0, np.sin(frames / 20) * 50, np.cos(frames / 30) * 20]),
+    "steps": lambda frames: np.floor(frames / 25) * 10.0,
+}
+
+
+@pytest.mark.parametrize("track", sorted(TRACKS))
+@pytest.mark.parametrize("tolerance", [0.0, 0.001, 0.01, 0.5])
+def test_error_stays_within_tolerance(track, tolerance):
+    frames = np.arange(2000, dtype=np.float64)
+    seconds = frames / 30
+    values = TRACKS[track](frames)
+    mask = Simplify.simplify(seconds, values, tolerance)
+    assert mask[0] and mask[-1]
+    assert max_error(seconds, values, mask) <= tolerance + 1e-9
+
+
+def test_uneven_key_times():
+    seconds = np.cumsum(np.random.RandomState(2).uniform(0.001, 0.01, 1000))
+    values = np.sin(seconds * 3) * 10
+    mask = Simplify.simplify(seconds, values, 0.05)
+    assert max_error(seconds, values, mask) <= 0.05 + 1e-9
+    assert mask.sum() < len(seconds) / 2
+
+
+def test_periodic_swings_keep_their_peaks():
+    # a long periodic track, the line between its first and last key crosses it every half period
+    frames = np.arange(40000, dtype=np.float64)
+    values = np.sin(2 * np.pi * frames / 40)
+    mask = Simplify.simplify(frames / 30, values, 0.01)
+    assert max_error(frames / 30, values, mask) <= 0.01 + 1e-9
+    # every peak and trough has to be a key
+    assert mask[10::40].all() and mask[30::40].all()
+
+
+def test_straight_line_keeps_the_ends():
+    seconds = np.linspace(0, 10, 500)
+    values = np.column_stack([seconds * 3 - 1, seconds * -2])
+    mask = Simplify.simplify(seconds, values, 1e-9)
+    assert np.flatnonzero(mask).tolist() == [0, 499]
+
+
+def test_keep_mask_is_kept():
+    seconds = np.linspace(0, 10, 100)
+    keep = np.zeros(100, dtype=bool)
+    keep[[17, 50, 83]] = True
+    mask = Simplify.simplify(seconds, seconds * 2, 0.1, keep)
+    assert np.flatnonzero(mask).tolist() == [0, 17, 50, 83, 99]
+
+
+@pytest.mark.parametrize("count", [0, 1, 2])
+def test_short_tracks_keep_everything(count):
+    seconds = np.arange(count, dtype=np.float64)
+    mask = Simplify.simplify(seconds, np.zeros((count, 3)), 0.1)
+    assert mask.shape == (count,)
+    assert mask.all()
+
+
+def test_ratio():
+    assert Simplify.ratio(100, 25) == 4.0
+    assert Simplify.ratio(0, 0) == 1.0